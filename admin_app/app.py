@@ -1,14 +1,24 @@
 #!/usr/bin/env python3
 import os
+import sys
+import atexit
+import bisect
+import concurrent.futures
+import copy
+import functools
+import heapq
+import itertools
 import json
 import datetime
 import shutil
+import threading
 import random
 import re
 import io
 import html as _html
 import urllib.request
 import urllib.parse
+from collections import OrderedDict, defaultdict
 from functools import wraps
 from pathlib import Path
 import importlib.util
@@ -16,9 +26,29 @@ from typing import Iterable
 import ipaddress
 
 try:
-    from PIL import Image, ImageDraw, ImageFont
+    import orjson
 except Exception:  # pragma: no cover
-    Image = ImageDraw = ImageFont = None
+    orjson = None
+
+try:
+    import urllib3
+except Exception:  # pragma: no cover
+    urllib3 = None
+
+try:
+    from selectolax.parser import HTMLParser
+except Exception:  # pragma: no cover
+    HTMLParser = None
+
+try:
+    import ijson
+except Exception:  # pragma: no cover
+    ijson = None
+
+try:
+    from PIL import Image, ImageDraw, ImageFont, ImageOps
+except Exception:  # pragma: no cover
+    Image = ImageDraw = ImageFont = ImageOps = None
 
 try:
     import qrcode
@@ -30,6 +60,11 @@ try:
 except Exception:  # pragma: no cover
     load_workbook = None
 
+try:
+    from python_calamine import CalamineWorkbook
+except Exception:  # pragma: no cover
+    CalamineWorkbook = None
+
 try:
     from paddleocr import PaddleOCR
 except Exception:  # pragma: no cover
@@ -54,53 +89,467 @@ DATA_PORTAL = _DATA_ROOT / 'portal_posts.json'
 DATA_STUDENTS_DB = _DATA_ROOT / 'students_ocr.json'
 DATA_HALL_OF_FAME = _DATA_ROOT / 'hall_of_fame_students.json'
 
-_TEACHERS_MANAGE = None
-_STUDENTS_MANAGE = None
 _OCR_ENGINE = None
 
 
-def _load_teachers_manage_module():
-    """动态加载 modules/teachers/manage.py 以复用其清洗/去重/归类规则。
+def _load_manage(name: str, relpath: str):
+    """动态加载 modules/*/manage.py 并以 sys.modules 为唯一缓存。
 
-    该目录不是 Python package（没有 __init__.py），所以用 importlib 载入。
+    该目录不是 Python package（没有 __init__.py），所以用 importlib 载入；
+    载入后注册进 sys.modules，重复调用（含多线程并发）只剩一次 dict 查找。
     """
-    global _TEACHERS_MANAGE
-    if _TEACHERS_MANAGE is not None:
-        return _TEACHERS_MANAGE
+    mod = sys.modules.get(name)
+    if mod is not None:
+        return mod
 
-    mod_path = ROOT / 'modules' / 'teachers' / 'manage.py'
-    spec = importlib.util.spec_from_file_location('teachers_manage', str(mod_path))
+    spec = importlib.util.spec_from_file_location(name, str(ROOT / relpath))
     if not spec or not spec.loader:
-        raise RuntimeError('无法加载 teachers/manage.py')
+        raise RuntimeError(f'无法加载 {relpath}')
     mod = importlib.util.module_from_spec(spec)
-    spec.loader.exec_module(mod)
-    _TEACHERS_MANAGE = mod
-    return _TEACHERS_MANAGE
+    sys.modules[name] = mod
+    try:
+        spec.loader.exec_module(mod)
+    except Exception:
+        sys.modules.pop(name, None)
+        raise
+    return mod
+
+
+def _load_teachers_manage_module():
+    """加载 modules/teachers/manage.py 以复用其清洗/去重/归类规则。"""
+    return _load_manage('teachers_manage', 'modules/teachers/manage.py')
 
 
 def _load_students_manage_module():
-    """动态加载 modules/students/manage.py 以复用校验/ID 生成/字段规范化逻辑。"""
-    global _STUDENTS_MANAGE
-    if _STUDENTS_MANAGE is not None:
-        return _STUDENTS_MANAGE
+    """加载 modules/students/manage.py 以复用校验/ID 生成/字段规范化逻辑。"""
+    return _load_manage('students_manage', 'modules/students/manage.py')
+
+
+def _json_loads(raw: bytes):
+    # orjson 直接吃 bytes，免去一次 UTF-8 decode；没装就退回 stdlib
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw.decode('utf-8'))
+
+
+def _json_dumps(data) -> bytes:
+    """序列化为带换行结尾的 2 空格缩进 JSON bytes（与 stdlib 输出一致）。"""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS | orjson.OPT_APPEND_NEWLINE)
+    return (json.dumps(data, ensure_ascii=False, indent=2) + '\n').encode('utf-8')
+
+
+# 海报 HTML→文本与路径/文件名清洗用的正则：预编译到模块级，避免每次请求重复查 re 缓存
+_RE_SCRIPT = re.compile(r'(?is)<(script|style)[^>]*>.*?</\1\s*>')
+_RE_BLOCK_BREAKS = re.compile(r'(?is)(</\s*p\s*>)|(</\s*(?:div|li)\s*>|<\s*br\s*/?\s*>)|(<\s*li\b[^>]*>)')
+_RE_TAG = re.compile(r'(?is)<[^>]+>')
+_RE_MULTI_NL = re.compile(r'\n{3,}')
+# 单字符替换用 translate（C 级单次遍历）；注意 \r\n 折叠是 2→1 字符，translate 做不了
+_CN_COMMA_TABLE = str.maketrans({'，': ','})
+# 成就列按 | 或换行分条：换行先映射成 |，split 过滤空串后与正则版等价
+_ACH_TRANS = str.maketrans({'\n': '|', '\r': '|'})
+_RE_SLASHES = re.compile(r'/+')
+# 三个上传入口和校验共用的图片后缀白名单；frozenset 常驻，不按请求重建
+_ALLOWED_IMG_EXT = frozenset({'.jpg', '.jpeg', '.png', '.webp'})
+_RE_UNSAFE_FN = re.compile(r'[^A-Za-z0-9_\-\.]+')
+_RE_DOTS = re.compile(r'\.+')
+# roleKey 形如 "id::部门::职务"：一次 match 同时完成校验和拆分
+_ROLE_KEY_RE = re.compile(r'([^:]+)::([^:]*)::(.*)\Z')
+# 表单/环境变量开关的"真值"集合，模块级只建一次；_TRUTHY_WIDE 额外接受
+# Excel 导入里常见的中文肯定写法（见 _boolish）
+_TRUTHY = frozenset({'1', 'on', 'true', 'yes', 'y', 't'})
+_TRUTHY_WIDE = _TRUTHY | {'是', '对', '√', '已', 'ok'}
+
+
+def _is_truthy(v) -> bool:
+    """开关值是否为真（大小写不敏感，None/空串为假）。"""
+    return str(v or '').strip().lower() in _TRUTHY
+
+
+def _block_break_repl(m: re.Match) -> str:
+    if m.group(1):  # </p>
+        return '\n\n'
+    if m.group(2):  # </div> / </li> / <br>
+        return '\n'
+    return '• '  # <li ...>
+
+
+# 与正则版一致的块级断行规则：闭合时补换行，<li> 前补项目符号
+_DOM_BLOCK_BREAKS = {'p': '\n\n', 'div': '\n', 'li': '\n'}
+
+
+def _dom_collect_text(node, out: list[str]):
+    for child in node.iter(include_text=True):
+        tag = child.tag
+        if tag == '-text':
+            out.append(child.text_content or '')
+            continue
+        if tag in ('script', 'style'):
+            continue
+        if tag == 'br':
+            out.append('\n')
+            continue
+        if tag == 'li':
+            out.append('• ')
+        _dom_collect_text(child, out)
+        brk = _DOM_BLOCK_BREAKS.get(tag)
+        if brk:
+            out.append(brk)
+
+
+def _copy_stream(src, dst_file):
+    """把上传流写入已打开的目标文件。
+
+    源流能拿到 fileno（werkzeug 的 SpooledTemporaryFile 落盘后就有）时优先
+    os.copy_file_range（文件到文件的内核拷贝，支持反射链克隆），其次
+    os.sendfile；都不行再用 1 MiB 缓冲的 copyfileobj，比默认 16 KiB 少一个
+    数量级的 syscall。
+    """
+    try:
+        src_fd = src.fileno()
+    except Exception:
+        src_fd = None
 
-    mod_path = ROOT / 'modules' / 'students' / 'manage.py'
-    spec = importlib.util.spec_from_file_location('students_manage', str(mod_path))
-    if not spec or not spec.loader:
-        raise RuntimeError('无法加载 students/manage.py')
-    mod = importlib.util.module_from_spec(spec)
-    spec.loader.exec_module(mod)
-    _STUDENTS_MANAGE = mod
-    return _STUDENTS_MANAGE
+    if src_fd is not None:
+        size = os.fstat(src_fd).st_size
+        for kernel_copy in ((os.copy_file_range,) if hasattr(os, 'copy_file_range') else ()) + \
+                ((os.sendfile,) if hasattr(os, 'sendfile') else ()):
+            try:
+                offset = 0
+                while offset < size:
+                    if kernel_copy is os.sendfile:
+                        sent = os.sendfile(dst_file.fileno(), src_fd, offset, size - offset)
+                    else:
+                        sent = os.copy_file_range(src_fd, dst_file.fileno(), size - offset, offset_src=offset)
+                    if sent == 0:
+                        break
+                    offset += sent
+                if offset >= size:
+                    return
+            except OSError:
+                pass
+            # 内核拷贝失败则清空已写内容，换下一种方式重来
+            dst_file.seek(0)
+            dst_file.truncate()
+        try:
+            src.seek(0)
+        except Exception:
+            pass
+
+    shutil.copyfileobj(src, dst_file, length=1024 * 1024)
+
+
+# 远程封面抓取：urllib3 连接池（复用 TCP/TLS 连接）+ 条件 GET 的小型 LRU 缓存
+_HTTP = urllib3.PoolManager(num_pools=4, maxsize=8) if urllib3 is not None else None
+_IMG_CACHE: OrderedDict = OrderedDict()  # url -> (条件请求头, 已解码 RGB Image)
+_IMG_CACHE_MAX = 32
+
+
+def _http_get(url: str, headers: dict):
+    """GET 一个 URL，返回 (status, body, headers)；304 不视为异常。"""
+    if _HTTP is not None:
+        resp = _HTTP.request('GET', url, headers=headers, timeout=6.0)
+        return resp.status, resp.data, resp.headers
+    req = urllib.request.Request(url, headers=headers)
+    try:
+        with urllib.request.urlopen(req, timeout=6) as r:
+            return getattr(r, 'status', 200), r.read(), r.headers
+    except urllib.error.HTTPError as e:
+        if e.code == 304:
+            return 304, b'', e.headers
+        raise
+
+
+def _fetch_remote_image(url: str):
+    """抓取远程图片并缓存解码结果；带 ETag/Last-Modified 时走条件 GET。"""
+    if Image is None:
+        return None
+
+    cached = _IMG_CACHE.get(url)
+    headers = {'User-Agent': 'Mozilla/5.0'}
+    if cached:
+        headers.update(cached[0])
+
+    try:
+        status, data, resp_headers = _http_get(url, headers)
+    except Exception:
+        return cached[1].copy() if cached else None
+
+    if status == 304 and cached:
+        _IMG_CACHE.move_to_end(url)
+        return cached[1].copy()
+    if status != 200 or not data:
+        return cached[1].copy() if cached else None
+
+    try:
+        img = Image.open(io.BytesIO(data)).convert('RGB')
+    except Exception:
+        return None
+
+    cond: dict[str, str] = {}
+    etag = resp_headers.get('ETag')
+    last_mod = resp_headers.get('Last-Modified')
+    if etag:
+        cond['If-None-Match'] = etag
+    if last_mod:
+        cond['If-Modified-Since'] = last_mod
+    _IMG_CACHE[url] = (cond, img)
+    _IMG_CACHE.move_to_end(url)
+    while len(_IMG_CACHE) > _IMG_CACHE_MAX:
+        _IMG_CACHE.popitem(last=False)
+    # 返回副本：调用方会 crop/resize，缓存里保留原图
+    return img.copy()
+
+
+@functools.lru_cache(maxsize=512)
+def _make_qr_cached(url: str, size: int):
+    """按 (url, size) 缓存渲染好的二维码，重复出图跳过 RS 编码/矩阵生成。"""
+    if Image is None or qrcode is None:
+        return None
+    try:
+        qr = qrcode.QRCode(
+            version=None,
+            error_correction=qrcode.constants.ERROR_CORRECT_M,
+            box_size=10,
+            border=2,
+        )
+        qr.add_data(url)
+        qr.make(fit=True)
+        img = qr.make_image(fill_color="black", back_color="white")
+        img = img.convert('RGB')
+        if img.size != (size, size):
+            # 二维码是纯色块，NEAREST 保边缘锐利且比默认重采样便宜得多
+            img = img.resize((size, size), Image.NEAREST)
+        return img
+    except Exception:
+        return None
+
+
+def _make_qr(url: str, size: int = 320):
+    url = str(url or '').strip()
+    if not url:
+        return None
+    img = _make_qr_cached(url, size)
+    # 调用方会把图贴进海报，副本保证缓存不被改动
+    return img.copy() if img is not None else None
+
+
+@functools.lru_cache(maxsize=16)
+def _rounded_mask(w: int, h: int, r: int):
+    """圆角遮罩只取决于 (w, h, r)，缓存共享；paste 只读遮罩，不会改到缓存。"""
+    mask = Image.new('L', (w, h), 0)
+    ImageDraw.Draw(mask).rounded_rectangle((0, 0, w, h), radius=r, fill=255)
+    return mask
+
+
+# 海报渲染线程池：Pillow 的缩放/编码重活会释放 GIL，池子把并发渲染数压到
+# CPU 核数以内，突发出图请求不会把所有 Flask worker 同时钉在渲染上
+_POSTER_POOL = concurrent.futures.ThreadPoolExecutor(
+    max_workers=max(1, min(4, os.cpu_count() or 1)), thread_name_prefix='poster')
+
+# 批量导入的读-合并-写阶段排进单工位队列：并发提交的导入按序落盘，
+# 不会出现两个请求同时读旧文件、后写的覆盖先写的
+_IMPORT_POOL = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix='import')
+
+
+# 海报静态底图缓存：同一 (theme, w, h) 的背景+白卡+色条只渲染一次
+_POSTER_BG_CACHE: dict = {}
+_POSTER_BG_CACHE_MAX = 8
+
+
+def _base_poster(theme: str, w: int, h: int):
+    """预渲染海报底图（纯静态部分），命中缓存时只付一次 copy 的成本。"""
+    key = (theme, w, h)
+    hit = _POSTER_BG_CACHE.get(key)
+    if hit is not None:
+        return hit.copy()
+
+    if theme == 'minimal':
+        img = Image.new('RGB', (w, h), (248, 248, 248))
+        accent = (24, 24, 26)
+    else:
+        img = Image.new('RGB', (w, h), (250, 250, 252))
+        accent = (102, 8, 116)
+    draw = ImageDraw.Draw(img)
+
+    pad = int(w * 0.065)
+    x0 = pad
+    x1 = w - pad
+    y = pad
+
+    # top accent + card
+    card_r = int(w * 0.04)
+    draw.rounded_rectangle((x0, y, x1, h - pad), radius=card_r, fill=(255, 255, 255))
+
+    # accent bar
+    accent_h = max(10, int(w * 0.012))
+    ax0 = x0 + int(w * 0.05)
+    ax1 = x1 - int(w * 0.05)
+    ay0 = y + int(w * 0.05)
+    draw.rounded_rectangle((ax0, ay0, ax1, ay0 + accent_h), radius=accent_h // 2, fill=accent)
+
+    # 固定页脚也属于静态部分，一并预渲染
+    font_small = _pick_cjk_font(int(w * 0.024))
+    x0c = x0 + int(w * 0.05)
+    draw.text((x0c, h - pad - int(w * 0.08)), '兰州润德艺术学校 · 信息门户', font=font_small, fill=(110, 110, 118))
+
+    if len(_POSTER_BG_CACHE) >= _POSTER_BG_CACHE_MAX:
+        _POSTER_BG_CACHE.pop(next(iter(_POSTER_BG_CACHE)))
+    _POSTER_BG_CACHE[key] = img
+    return img.copy()
+
+
+@functools.lru_cache(maxsize=1)
+def _cjk_font_path() -> str:
+    """探测一次可用的中文字体路径；机器上的字体不会中途变化。"""
+    candidates = [
+        # macOS
+        '/System/Library/Fonts/PingFang.ttc',
+        '/System/Library/Fonts/STHeiti Medium.ttc',
+        '/System/Library/Fonts/Hiragino Sans GB.ttc',
+        # common linux paths
+        '/usr/share/fonts/opentype/noto/NotoSansCJK-Regular.ttc',
+        '/usr/share/fonts/truetype/noto/NotoSansCJK-Regular.ttc',
+        '/usr/share/fonts/truetype/noto/NotoSansCJKsc-Regular.otf',
+    ]
+    for p in candidates:
+        try:
+            if Path(p).exists():
+                return p
+        except Exception:
+            continue
+    return ''
+
+
+@functools.lru_cache(maxsize=32)
+def _pick_cjk_font(size: int):
+    """按字号缓存已加载的字体对象：TTC 解析只做一次，后续海报直接复用。"""
+    if ImageFont is None:
+        return None
+
+    p = _cjk_font_path()
+    if p:
+        try:
+            return ImageFont.truetype(p, size=size)
+        except Exception:
+            pass
+
+    try:
+        return ImageFont.load_default()
+    except Exception:
+        return None
+
+
+def _dept(r: dict) -> str:
+    """role 的部门名；等价于 str(x or '').strip()，但常见的 str 情况零多余分配。"""
+    v = r.get('department')
+    if isinstance(v, str):
+        return v.strip()
+    return str(v).strip() if v else ''
+
+
+def _pos(r: dict) -> str:
+    """role 的岗位名，同 _dept 的快路径。"""
+    v = r.get('position')
+    if isinstance(v, str):
+        return v.strip()
+    return str(v).strip() if v else ''
+
+
+def _now_stamp(now=None) -> str:
+    """上传文件名用的时间戳；f-string 走 C 级格式化，绕开 strftime 的 locale 查询。"""
+    if now is None:
+        now = datetime.datetime.now()
+    return f'{now.year:04d}{now.month:02d}{now.day:02d}_{now.hour:02d}{now.minute:02d}{now.second:02d}'
+
+
+@functools.lru_cache(maxsize=8192)
+def _char_width(font, ch: str) -> float:
+    """单字宽度缓存。字体对象来自 _pick_cjk_font，本身就按字号复用，键稳定。"""
+    return font.getlength(ch)
+
+
+@functools.lru_cache(maxsize=256)
+def _text_w(font, text: str) -> float:
+    """整串宽度缓存，用于二维码说明这类每次请求都相同的固定文案。"""
+    return font.getlength(text)
+
+
+def _canonicalize_ids(data):
+    """解析后把列表记录的 id 一次性 strip + intern（幂等）。
+
+    下游的 id 比较就是单次哈希/指针判等，不再每次 str()+strip() 各分配一遍。
+    """
+    if isinstance(data, list):
+        for item in data:
+            if isinstance(item, dict):
+                iid = item.get('id')
+                if isinstance(iid, str):
+                    item['id'] = sys.intern(iid.strip())
+    return data
+
+
+@functools.lru_cache(maxsize=16)
+def _load_json_cached(path_str: str, mtime_ns: int, size: int):
+    """按 (路径, mtime, size) 缓存解析结果，文件一变 key 就变，旧条目自然淘汰。"""
+    return _canonicalize_ids(_json_loads(Path(path_str).read_bytes()))
+
+
+# 超过 1 MiB 的列表改走流式解析：峰值内存从 O(文件) 降到 O(单条记录)
+_STREAM_JSON_MIN_SIZE = 1 << 20
+
+
+def _stream_json_list(path: Path) -> list:
+    with path.open('rb') as f:
+        return _canonicalize_ids(list(ijson.items(f, 'item', use_float=True)))
 
 
 def _safe_int(v, default=10**9):
+    # 排序 key 里高频调用：常见类型直接走 isinstance 判断，
+    # 不拿异常当控制流（抛/接一次比类型检查贵一个量级）
+    if type(v) is int:
+        return v
+    if isinstance(v, str):
+        s = v.strip()
+        # isdecimal 而非 isdigit：isdigit 会放过 '²' 这类 int() 不认的字符
+        if s and (s.isdecimal() or (s[0] == '-' and s[1:].isdecimal())):
+            return int(s)
+        return default
     try:
         return int(v)
     except Exception:
         return default
 
 
+def _basename(p: str) -> str:
+    # 导入循环里只要最后一段路径：纯字符串切片，不为此构造 PurePath
+    return p[p.rfind('/') + 1:]
+
+
+def _build_dept_stats(teachers: list[dict]) -> tuple[dict[str, set], dict[str, int]]:
+    """一次扫描共建两张派生表：老师id→所在部门集合、部门→最大 order。"""
+    teacher_depts: dict[str, set] = {}
+    dept_max_order: dict[str, int] = {}
+    for t in teachers:
+        tid = str(t.get('id') or '').strip()
+        depts: set = set()
+        for r in (t.get('roles') or []):
+            d = _dept(r)
+            depts.add(d)
+            o = _safe_int(r.get('order'), default=0)
+            if o > dept_max_order.get(d, 0):
+                dept_max_order[d] = o
+        if tid:
+            teacher_depts[tid] = depts
+    return teacher_depts, dept_max_order
+
+
+@functools.lru_cache(maxsize=4)
+def _dept_stats_cached(path_str: str, mtime_ns: int, size: int):
+    # 键与 _load_json_cached 相同：文件一变自动换新条目；返回值只读共享
+    return _build_dept_stats(_load_json_cached(path_str, mtime_ns, size))
+
+
 def create_app():
     app = Flask(__name__, template_folder='templates', static_folder='static')
 
@@ -113,6 +562,29 @@ def create_app():
     # 你必须设置一个随机的 SECRET_KEY（用于 session cookie）
     app.secret_key = os.environ.get('ADMIN_SECRET_KEY') or 'CHANGE_ME_ADMIN_SECRET_KEY'
 
+    # manage 模块建应用时加载一次，热路径函数绑成局部名：
+    # 导入/编辑的逐行循环里不再付 sys.modules 查找 + getattr 的钱
+    _sm = _load_students_manage_module()
+    _tm = _load_teachers_manage_module()
+    _sm_norm_line = _sm.norm_line
+    _sm_canonical_id = _sm.canonical_id
+    _sm_validate_data = _sm.validate_data
+    _tm_norm_line = _tm.norm_line
+    _tm_clean_dept = _tm.clean_dept
+    _tm_normalize_name = _tm.normalize_name
+    _tm_normalize_data = _tm.normalize_data
+    _tm_merge_teachers_by_name = _tm.merge_teachers_by_name
+    _tm_normalize_teacher_roles = _tm.normalize_teacher_roles
+    _tm_mgmt_order = list(getattr(_tm, 'MGMT_ORDER', []) or [])
+
+    def _json(obj, status: int = 200):
+        """热路径上的 JSON 响应：orjson 直接给 bytes，跳过 Flask 的 stdlib 编码器。"""
+        if orjson is not None:
+            body = orjson.dumps(obj)
+        else:
+            body = json.dumps(obj, ensure_ascii=False).encode('utf-8')
+        return app.response_class(body, status=status, mimetype='application/json')
+
     def is_authed() -> bool:
         return bool(session.get('admin_authed'))
 
@@ -143,7 +615,7 @@ def create_app():
         except Exception:
             return False
 
-        parts = [p.strip() for p in raw.replace('，', ',').split(',') if p.strip()]
+        parts = [p.strip() for p in raw.translate(_CN_COMMA_TABLE).split(',') if p.strip()]
         for p in parts:
             try:
                 if '/' in p:
@@ -175,7 +647,12 @@ def create_app():
             return
         ts = datetime.datetime.now().strftime('%Y%m%d%H%M%S')
         bak = path.with_suffix(path.suffix + '.bak.' + ts)
-        shutil.copy2(path, bak)
+        try:
+            # 同一文件系统直接建硬链接（O(1) 零拷贝）；write_json 之后用
+            # os.replace 换新 inode，旧内容仍挂在备份名下
+            os.link(path, bak)
+        except OSError:
+            shutil.copy2(path, bak)
 
     def _github_cfg():
         mode = (os.environ.get('ADMIN_STORAGE') or '').strip().lower()
@@ -300,6 +777,11 @@ def create_app():
             out.append({'sha': sha[:12], 'message': msg or '—', 'date': date.replace('T', ' ').replace('Z', ''), 'url': url_html})
         return out
 
+    # 写合并：编辑/重排 UI 短时间连点保存时，窗口内只落盘最终状态一次。
+    # 未落盘的数据挂在这里，load_json/load_json_ro 先查它，读不到旧盘面。
+    _pending_writes: dict[Path, tuple[object, threading.Timer]] = {}
+    _pending_lock = threading.Lock()
+
     def load_json(path: Path):
         if _github_enabled():
             try:
@@ -309,25 +791,116 @@ def create_app():
             content, _sha = _gh_get_file(rel)
             if not content:
                 return []
-            return json.loads(content.decode('utf-8'))
+            return _json_loads(content)
+
+        ent = _pending_writes.get(path)
+        if ent is not None:
+            return copy.deepcopy(ent[0])
+        if not path.exists():
+            return []
+        st = path.stat()
+        # 大文件不进缓存（16 份大列表会吃掉内存），逐条流式构建
+        if ijson is not None and st.st_size > _STREAM_JSON_MIN_SIZE:
+            return _stream_json_list(path)
+        # 深拷贝返回：调用方会就地修改，不能把缓存里的对象交出去
+        return copy.deepcopy(_load_json_cached(str(path), st.st_mtime_ns, st.st_size))
+
+    def load_json_ro(path: Path):
+        """只读视图：命中缓存时直接共享解析结果，不付 deepcopy 的成本。
 
+        仅供纯展示的 GET 路由使用，调用方不得就地修改返回值。
+        """
+        if _github_enabled():
+            return load_json(path)
+        ent = _pending_writes.get(path)
+        if ent is not None:
+            return ent[0]
         if not path.exists():
             return []
-        return json.loads(path.read_text(encoding='utf-8'))
+        st = path.stat()
+        if ijson is not None and st.st_size > _STREAM_JSON_MIN_SIZE:
+            return _stream_json_list(path)
+        return _load_json_cached(str(path), st.st_mtime_ns, st.st_size)
 
     def write_json(path: Path, data):
-        payload = (json.dumps(data, ensure_ascii=False, indent=2) + '\n').encode('utf-8')
         if _github_enabled():
             try:
                 rel = path.relative_to(ROOT).as_posix()
             except Exception:
                 raise RuntimeError('GitHub 存储模式仅支持写入仓库内文件')
-            _gh_put_file(rel, payload, message=f'更新 {rel}')
+            _gh_put_file(rel, _json_dumps(data), message=f'更新 {rel}')
             return
 
+        # 先取消同路径还没落盘的延迟写：调用方读到的是 pending 覆盖层（load_json 先查它），
+        # 本次直写已包含那份状态；不取消的话定时器稍后会用旧载荷把这次写入盖掉
+        with _pending_lock:
+            ent = _pending_writes.pop(path, None)
+        if ent is not None:
+            ent[1].cancel()
+
         path.parent.mkdir(parents=True, exist_ok=True)
         backup_file(path)
-        path.write_text(payload.decode('utf-8'), encoding='utf-8')
+        # 写临时文件再原子替换：不会把硬链接备份一起改掉，也避免写一半被读到
+        tmp = path.with_suffix(path.suffix + '.tmp')
+        if orjson is not None:
+            # orjson 一次性给出 bytes，单个 write 落盘
+            tmp.write_bytes(_json_dumps(data))
+        else:
+            # stdlib 退路：json.dump 直接流进大缓冲文件，省掉整串中间字符串
+            with tmp.open('w', encoding='utf-8', buffering=1 << 20) as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+                f.write('\n')
+        os.replace(tmp, path)
+        # 写入后让读缓存失效，下一次 load_json 重新解析
+        _load_json_cached.cache_clear()
+        _dept_stats_cached.cache_clear()
+
+    def _flush_pending(path: Path):
+        with _pending_lock:
+            ent = _pending_writes.pop(path, None)
+        if ent is not None:
+            write_json(path, ent[0])
+
+    def _flush_all_pending():
+        for p in list(_pending_writes):
+            _flush_pending(p)
+
+    def _schedule_write(path: Path, data, delay: float = 0.5):
+        """延迟 delay 秒落盘；窗口内的后续写会顶掉前一次，只写最终状态。
+
+        仅用于单操作者的编辑/重排保存：快速连点不再每次都整文件落盘。
+        GitHub 存储模式没有本地文件可合并，直接走 write_json。
+        """
+        if _github_enabled():
+            write_json(path, data)
+            return
+        with _pending_lock:
+            prev = _pending_writes.get(path)
+            if prev is not None:
+                prev[1].cancel()
+            timer = threading.Timer(delay, _flush_pending, args=(path,))
+            timer.daemon = True
+            _pending_writes[path] = (data, timer)
+            timer.start()
+
+    # 进程退出前把窗口内还没落盘的数据冲掉，避免丢最后一次保存
+    atexit.register(_flush_all_pending)
+
+    def _count_json_list(path: Path) -> int:
+        """只需要条数时的读取：大文件流式数数，不把整个列表物化进内存。"""
+        if not _github_enabled():
+            try:
+                st = path.stat()
+            except OSError:
+                return 0
+            if ijson is not None and st.st_size > _STREAM_JSON_MIN_SIZE:
+                n = 0
+                with path.open('rb') as f:
+                    for _ in ijson.items(f, 'item', use_float=True):
+                        n += 1
+                return n
+        data = load_json(path)
+        return len(data) if isinstance(data, list) else 0
 
     def _now_iso() -> str:
         return datetime.datetime.now().isoformat(timespec='seconds')
@@ -338,7 +911,7 @@ def create_app():
         return f'{prefix}_{ts}_{rand}'
 
     def _norm_tags(s: str) -> list[str]:
-        s = str(s or '').replace('，', ',')
+        s = str(s or '').translate(_CN_COMMA_TABLE)
         out: list[str] = []
         for part in s.split(','):
             t = str(part or '').strip()
@@ -358,6 +931,11 @@ def create_app():
         data = load_json(DATA_PORTAL)
         return data if isinstance(data, list) else []
 
+    def _load_portal_posts_indexed() -> tuple[list[dict], dict[str, dict]]:
+        """读文章列表并顺带建一份 {id: post} 索引，单篇查找 O(1)。"""
+        posts = _load_portal_posts()
+        return posts, {str(p.get('id') or ''): p for p in posts if p.get('id')}
+
     def _save_portal_posts(posts: list[dict]):
         write_json(DATA_PORTAL, posts)
 
@@ -456,17 +1034,13 @@ def create_app():
             out['earTraining'] = _find(r'(听写|练耳)[:：]?([0-9.]+)')
         return out
 
-    def _find_post(posts: list[dict], pid: str) -> dict | None:
-        pid = str(pid or '').strip()
-        for p in posts:
-            if str(p.get('id') or '') == pid:
-                return p
-        return None
+    def _find_post(posts_by_id: dict[str, dict], pid: str) -> dict | None:
+        return posts_by_id.get(str(pid or '').strip())
 
     def _safe_filename(name: str) -> str:
         name = str(name or '').strip().replace(' ', '_')
-        name = re.sub(r'[^A-Za-z0-9_\-\.]+', '', name)
-        name = re.sub(r'\.+', '.', name)
+        name = _RE_UNSAFE_FN.sub('', name)
+        name = _RE_DOTS.sub('.', name)
         return name[:120] if name else 'image'
 
     def _html_to_text_simple(html_s: str) -> str:
@@ -475,51 +1049,38 @@ def create_app():
         Keeps basic block breaks so the poster has readable paragraphs.
         """
         s = str(html_s or '')
-        # normalize common breaks
-        s = re.sub(r'(?is)<\s*br\s*/?\s*>', '\n', s)
-        s = re.sub(r'(?is)</\s*p\s*>', '\n\n', s)
-        s = re.sub(r'(?is)</\s*div\s*>', '\n', s)
-        s = re.sub(r'(?is)</\s*li\s*>', '\n', s)
-        # turn list items into bullets
-        s = re.sub(r'(?is)<\s*li\b[^>]*>', '• ', s)
-        # strip the rest tags
-        s = re.sub(r'(?is)<[^>]+>', '', s)
-        s = _html.unescape(s)
+        if HTMLParser is not None:
+            # C 级 HTML 解析器：一次 DOM 遍历出文本，实体也顺带解码
+            tree = HTMLParser(s)
+            parts: list[str] = []
+            _dom_collect_text(tree.body or tree.root, parts)
+            s = ''.join(parts)
+        else:
+            # script/style 的内容不是正文，整块去掉
+            s = _RE_SCRIPT.sub('', s)
+            # normalize common breaks / list bullets in one pass
+            s = _RE_BLOCK_BREAKS.sub(_block_break_repl, s)
+            # strip the rest tags
+            s = _RE_TAG.sub('', s)
+            s = _html.unescape(s)
         # cleanup
         s = s.replace('\r\n', '\n').replace('\r', '\n')
-        s = re.sub(r'\n{3,}', '\n\n', s)
+        s = _RE_MULTI_NL.sub('\n\n', s)
         return s.strip()
 
-    def _pick_cjk_font(size: int):
-        if ImageFont is None:
-            return None
-
-        candidates = [
-            # macOS
-            '/System/Library/Fonts/PingFang.ttc',
-            '/System/Library/Fonts/STHeiti Medium.ttc',
-            '/System/Library/Fonts/Hiragino Sans GB.ttc',
-            # common linux paths
-            '/usr/share/fonts/opentype/noto/NotoSansCJK-Regular.ttc',
-            '/usr/share/fonts/truetype/noto/NotoSansCJK-Regular.ttc',
-            '/usr/share/fonts/truetype/noto/NotoSansCJKsc-Regular.otf',
-        ]
-        for p in candidates:
-            try:
-                if Path(p).exists():
-                    return ImageFont.truetype(p, size=size)
-            except Exception:
-                continue
-
-        try:
-            return ImageFont.load_default()
-        except Exception:
-            return None
-
     def _wrap_text(draw, text: str, font, max_width: int) -> list[str]:
         """Wrap text to fit in pixel width."""
         if not text:
             return []
+
+        if hasattr(draw, 'textlength'):
+            def measure(s: str):
+                return draw.textlength(s, font=font)
+        else:
+            def measure(s: str):
+                return draw.textbbox((0, 0), s, font=font)[2]
+
+        use_glyphs = hasattr(font, 'getlength')
         lines: list[str] = []
         for para in str(text).split('\n'):
             para = para.rstrip()
@@ -527,25 +1088,51 @@ def create_app():
                 lines.append('')
                 continue
 
-            cur = ''
-            for ch in para:
-                test = cur + ch
-                w = draw.textlength(test, font=font) if hasattr(draw, 'textlength') else draw.textbbox((0, 0), test, font=font)[2]
-                if w <= max_width:
-                    cur = test
-                else:
-                    if cur:
-                        lines.append(cur)
-                        cur = ch
+            if use_glyphs:
+                # 每个不同字符只量一次，前缀宽度用累计和表示；CJK 没有字偶距，
+                # 逐字求和与整串测量一致，断行只剩 bisect 查表
+                acc = list(itertools.accumulate(_char_width(font, ch) for ch in para))
+                start = 0
+                n = len(para)
+                base = 0.0
+                while start < n:
+                    if acc[n - 1] - base <= max_width:
+                        lines.append(para[start:])
+                        break
+                    end = bisect.bisect_right(acc, base + max_width, start, n)
+                    # 单字符超宽时也强制推进一个字符，避免死循环
+                    end = max(end, start + 1)
+                    lines.append(para[start:end])
+                    base = acc[end - 1]
+                    start = end
+                continue
+
+            # 宽度随前缀长度单调增长：倍增+二分找最长可容纳前缀，
+            # 每行 O(log N) 次测量，而不是逐字符测量
+            start = 0
+            n = len(para)
+            while start < n:
+                rest = para[start:]
+                if measure(rest) <= max_width:
+                    lines.append(rest)
+                    break
+                lo, hi = 1, 2
+                while hi < n - start and measure(para[start:start + hi]) <= max_width:
+                    lo, hi = hi, hi * 2
+                hi = min(hi, n - start)
+                while lo < hi:
+                    mid = (lo + hi + 1) // 2
+                    if measure(para[start:start + mid]) <= max_width:
+                        lo = mid
                     else:
-                        # single char too wide (unlikely), force
-                        lines.append(ch)
-                        cur = ''
-            if cur:
-                lines.append(cur)
+                        hi = mid - 1
+                # 单字符超宽时也强制推进一个字符，避免死循环
+                lo = max(lo, 1)
+                lines.append(para[start:start + lo])
+                start += lo
         return lines
 
-    def _load_image_any(src: str):
+    def _load_image_any(src: str, draft_size=None):
         if Image is None:
             return None
         src = str(src or '').strip()
@@ -557,47 +1144,23 @@ def create_app():
             rp = _norm_json_path(src)
             p = ROOT / rp
             if p.exists() and p.is_file():
-                return Image.open(p).convert('RGB')
+                im = Image.open(p)
+                if draft_size and im.format == 'JPEG':
+                    # libjpeg 在解码阶段直接按 1/2、1/4、1/8 缩，省掉全分辨率解码
+                    im.draft('RGB', draft_size)
+                return im.convert('RGB')
         except Exception:
             pass
 
         # remote url
         if src.startswith('http://') or src.startswith('https://'):
-            try:
-                req = urllib.request.Request(src, headers={'User-Agent': 'Mozilla/5.0'})
-                with urllib.request.urlopen(req, timeout=6) as resp:
-                    data = resp.read()
-                return Image.open(io.BytesIO(data)).convert('RGB')
-            except Exception:
-                return None
+            return _fetch_remote_image(src)
 
         return None
 
-    def _make_qr(url: str, size: int = 320):
-        if Image is None or qrcode is None:
-            return None
-        url = str(url or '').strip()
-        if not url:
-            return None
-        try:
-            qr = qrcode.QRCode(
-                version=None,
-                error_correction=qrcode.constants.ERROR_CORRECT_M,
-                box_size=10,
-                border=2,
-            )
-            qr.add_data(url)
-            qr.make(fit=True)
-            img = qr.make_image(fill_color="black", back_color="white")
-            img = img.convert('RGB')
-            img = img.resize((size, size))
-            return img
-        except Exception:
-            return None
-
     def _clean_upload_relpath(p: str) -> str:
         p = (p or '').replace('\\', '/').lstrip('/')
-        p = re.sub(r'/+', '/', p)
+        p = _RE_SLASHES.sub('/', p)
         parts = [x for x in p.split('/') if x not in ('', '.')]
         if any(x == '..' for x in parts):
             raise ValueError('path contains ..')
@@ -609,30 +1172,29 @@ def create_app():
         Browsers usually prefix all filenames with the selected folder name.
         We strip the common first path component when possible.
         """
-        cleaned = []
+        # 一次遍历 files 就把 (清洗后的相对路径, 文件) 配好，后面只在字符串上做前缀处理
+        pairs: list[tuple[str, object]] = []
         for f in files:
             if not getattr(f, 'filename', None):
                 continue
-            cleaned.append(_clean_upload_relpath(f.filename))
+            pairs.append((_clean_upload_relpath(f.filename), f))
 
-        if not cleaned:
+        if not pairs:
             return {'prefix': '', 'files': {}}
 
-        first_parts = [p.split('/')[0] for p in cleaned if '/' in p]
+        first_parts = {p.split('/', 1)[0] for p, _f in pairs if '/' in p}
         prefix = ''
-        if first_parts and len(set(first_parts)) == 1:
-            candidate = first_parts[0]
+        if len(first_parts) == 1:
+            candidate = next(iter(first_parts))
             # only strip if all paths either start with candidate/ or equal candidate
-            if all(p == candidate or p.startswith(candidate + '/') for p in cleaned):
+            if all(p == candidate or p.startswith(candidate + '/') for p, _f in pairs):
                 prefix = candidate
 
         out: dict[str, object] = {}
-        for f in files:
-            if not getattr(f, 'filename', None):
-                continue
-            p = _clean_upload_relpath(f.filename)
-            if prefix and (p == prefix or p.startswith(prefix + '/')):
-                p = p[len(prefix) + 1:] if p != prefix else ''
+        strip_len = len(prefix) + 1
+        for p, f in pairs:
+            if prefix:
+                p = '' if p == prefix else p[strip_len:]
             if not p:
                 continue
             out[p] = f
@@ -654,56 +1216,73 @@ def create_app():
             txt = raw.decode('utf-8-sig', errors='replace')
         return json.loads(txt)
 
-    def _save_uploaded_file(file_map: dict, src_relpath: str, dest: Path):
-        f = file_map.get(src_relpath)
+    def _save_uploaded_file(f, dest: Path):
+        # 调用方已经在上传映射里校验并取到了 FileStorage，这里不再重查一次键
         if not f:
-            raise FileNotFoundError(src_relpath)
+            raise FileNotFoundError(str(dest))
         dest.parent.mkdir(parents=True, exist_ok=True)
         try:
             f.stream.seek(0)
         except Exception:
             pass
         with dest.open('wb') as w:
-            shutil.copyfileobj(f.stream, w)
+            _copy_stream(f.stream, w)
 
-    def _find_upload_by_basename(file_map: dict, filename: str) -> str | None:
-        """Return a unique key whose basename matches filename.
+    def _run_copy_plan(file_map: dict, copies: list[tuple[str, Path]]) -> int:
+        """校验全部通过后再统一执行的复制计划。
 
-        If multiple matches exist, return None and let caller raise an error.
+        多个小文件并行复制（I/O 等待互相重叠）；同一请求内同样的
+        (源, 目标) 只复制一次。必须在请求线程里等它做完——
+        FileStorage 的流在请求结束后会被 werkzeug 关掉。
         """
-        filename = str(filename or '').strip()
-        if not filename:
-            return None
-        matches = [k for k in file_map.keys() if Path(k).name == filename]
-        if len(matches) == 1:
-            return matches[0]
-        return None
+        plan = list(dict.fromkeys(copies))
+        if not plan:
+            return 0
+        if len(plan) == 1:
+            src, dest = plan[0]
+            _save_uploaded_file(file_map[src], dest)
+            return 1
+        with concurrent.futures.ThreadPoolExecutor(max_workers=8, thread_name_prefix='copy') as ex:
+            list(ex.map(lambda c: _save_uploaded_file(file_map[c[0]], c[1]), plan))
+        return len(plan)
+
+    def _basename_index(file_map: dict) -> dict[str, list[str]]:
+        """Index upload keys by basename once per request.
+
+        Callers treat one hit as the match and multiple hits as ambiguous.
+        """
+        idx: dict[str, list[str]] = {}
+        for k in file_map:
+            idx.setdefault(_basename(k), []).append(k)
+        return idx
 
     def _is_allowed_image(path: str) -> bool:
         ext = (Path(path).suffix or '').lower()
-        return ext in {'.jpg', '.jpeg', '.png', '.webp'}
+        return ext in _ALLOWED_IMG_EXT
 
     def _norm_json_path(p: str) -> str:
         p = str(p or '').strip().replace('\\', '/')
-        p = re.sub(r'/+', '/', p)
+        p = _RE_SLASHES.sub('/', p)
         if p.startswith('/'):
             raise ValueError('absolute path not allowed')
         if '..' in p.split('/'):
             raise ValueError('path contains ..')
         return p
 
-    def _merge_by_id(existing: list[dict], incoming: list[dict], *, mode: str) -> tuple[list[dict], int, int]:
-        idx = {str(x.get('id')): x for x in existing if x.get('id')}
-        created = 0
-        updated = 0
+    def _merge_by_id(existing: list[dict], incoming: list[dict], *, mode: str) -> tuple[list[dict], list[dict], list[dict]]:
+        # 两边的 id 统一 strip + intern：键一致才查得到，intern 让 dict 哈希/比较更省
+        idx = {sys.intern(str(x.get('id')).strip()): x for x in existing if x.get('id')}
+        created: list[dict] = []
+        updated: list[dict] = []
         for item in incoming:
             iid = str(item.get('id') or '').strip()
             if not iid:
                 continue
+            iid = sys.intern(iid)
             if iid not in idx:
                 existing.append(item)
                 idx[iid] = item
-                created += 1
+                created.append(item)
                 continue
 
             if mode == 'replace':
@@ -718,19 +1297,67 @@ def create_app():
                     if k == 'id':
                         continue
                     cur[k] = v
-            updated += 1
+            updated.append(cur)
         return existing, created, updated
 
+    def _finalize_teachers(ts: list[dict], touched: list[dict] | None = None) -> list[dict]:
+        ts = _normalize_all_teachers(ts)
+        _enforce_mgmt_order(ts)
+        return ts
+
+    def _student_sort_key(x: dict):
+        return (-_safe_int(x.get('year'), default=0), str(x.get('name') or ''))
+
+    def _finalize_students(ss: list[dict], touched: list[dict] | None = None) -> list[dict]:
+        # keep a stable order: year desc, name asc
+        if touched and len(touched) < len(ss):
+            # 盘面列表每次写入都按 key 排过序：只需把这次动过的小批量
+            # 单独排序后归并回去，免掉整表 Timsort
+            touched_ids = {id(x) for x in touched}
+            base = [x for x in ss if id(x) not in touched_ids]
+            if all(_student_sort_key(base[i]) <= _student_sort_key(base[i + 1])
+                   for i in range(len(base) - 1)):
+                batch = sorted(touched, key=_student_sort_key)
+                return list(heapq.merge(base, batch, key=_student_sort_key))
+            # 盘面被人工改乱过序时退回整表排序
+        ss.sort(key=_student_sort_key)
+        return ss
+
+    def _commit_import(path: Path, normalized: list[dict], *, mode: str, finalize, dry_run: bool):
+        """导入的合并+落盘阶段整体排进 _IMPORT_POOL 串行执行。
+
+        dry_run 也走同一条路径拿 created/updated，只是最后不写文件。
+        """
+        def _job():
+            existing = load_json(path)
+            merged, created, updated = _merge_by_id(existing, normalized, mode=mode)
+            merged = finalize(merged, created + updated)
+            if not dry_run:
+                write_json(path, merged)
+            return len(created), len(updated)
+
+        return _IMPORT_POOL.submit(_job).result(timeout=120)
+
     def _read_xlsx_rows(file_storage, *, required_cols: list[str]) -> list[dict]:
-        if load_workbook is None:
-            raise RuntimeError('缺少 openpyxl，无法解析 .xlsx（请先安装 openpyxl）')
         try:
             file_storage.stream.seek(0)
         except Exception:
             pass
-        wb = load_workbook(file_storage.stream, data_only=True)
-        ws = wb.active
-        rows = list(ws.iter_rows(values_only=True))
+        if CalamineWorkbook is not None:
+            # Rust 解析器：大表导入比 openpyxl 的纯 Python XML 解析快一个数量级
+            wb = CalamineWorkbook.from_filelike(file_storage.stream)
+            rows = wb.get_sheet_by_name(wb.sheet_names[0]).to_python()
+        else:
+            if load_workbook is None:
+                raise RuntimeError('缺少 openpyxl，无法解析 .xlsx（请先安装 openpyxl）')
+            # read_only：按行流式读纯值，不构造带样式的 Cell，也不整表驻留内存
+            wb = load_workbook(file_storage.stream, read_only=True, data_only=True, keep_links=False)
+            try:
+                ws = wb.active
+                rows = list(ws.iter_rows(values_only=True))
+            finally:
+                # read_only 模式持有 zip 句柄，显式关掉
+                wb.close()
         if not rows:
             return []
         header = [str(x).strip() if x is not None else '' for x in rows[0]]
@@ -754,6 +1381,9 @@ def create_app():
                     v = v.strip()
                     if v == '':
                         continue
+                elif isinstance(v, float) and v.is_integer():
+                    # calamine 的数字单元格回来是 float，整数值还原成 int 与 openpyxl 对齐
+                    v = int(v)
                 d[h] = v
                 empty = False
             if not empty:
@@ -761,49 +1391,68 @@ def create_app():
         return out
 
     def _boolish(v) -> bool:
-        if v is None:
-            return False
         if isinstance(v, bool):
             return v
-        s = str(v).strip().lower()
-        return s in {'1', 'true', 'yes', 'y', '是', '对', '√', '已', 'ok'}
+        return str(v or '').strip().lower() in _TRUTHY_WIDE
 
     def _enforce_mgmt_order(teachers: list[dict]):
-        tm = _load_teachers_manage_module()
-        mgmt_rank = {n: i + 1 for i, n in enumerate(getattr(tm, 'MGMT_ORDER', []) or [])}
+        mgmt_rank = {n: i + 1 for i, n in enumerate(_tm_mgmt_order)}
         for t in teachers:
-            name = getattr(tm, 'normalize_name')(t.get('name') or '')
+            name = _tm_normalize_name(t.get('name') or '')
             rank = mgmt_rank.get(name)
             if not rank:
                 continue
             for r in (t.get('roles') or []):
-                if getattr(tm, 'clean_dept')(r.get('department') or '') == '管理部':
+                if _tm_clean_dept(r.get('department') or '') == '管理部':
                     r['order'] = rank
 
     def _role_key(t: dict, r: dict) -> str:
         return f"{t.get('id','')}::{str(r.get('department') or '')}::{str(r.get('position') or '')}"
 
+    def _teacher_dept_stats() -> tuple[dict[str, set], dict[str, int]]:
+        """教师表的（老师id→部门集合, 部门→最大order）派生索引，走 mtime 缓存。
+
+        返回值与缓存共享，调用方不得就地修改。
+        """
+        if _github_enabled() or DATA_TEACHERS in _pending_writes or not DATA_TEACHERS.exists():
+            return _build_dept_stats(load_json_ro(DATA_TEACHERS))
+        st = DATA_TEACHERS.stat()
+        if ijson is not None and st.st_size > _STREAM_JSON_MIN_SIZE:
+            return _build_dept_stats(load_json_ro(DATA_TEACHERS))
+        return _dept_stats_cached(str(DATA_TEACHERS), st.st_mtime_ns, st.st_size)
+
+    def _index_by_id(teachers: list[dict]) -> dict[str, dict]:
+        """id → teacher 索引：按 id 定位时 O(1)，替代整表线性扫描。"""
+        return {str(t.get('id') or ''): t for t in teachers if t.get('id')}
+
+    def _index_by_dept(teachers: list[dict]) -> dict[str, list[tuple[dict, dict]]]:
+        """按部门聚合 (teacher, role)，一次扫描供后续各遍查索引，不再整表重扫。"""
+        d: dict[str, list[tuple[dict, dict]]] = {}
+        for t in teachers:
+            for r in (t.get('roles') or []):
+                d.setdefault(_dept(r), []).append((t, r))
+        return d
+
     def _normalize_all_teachers(teachers: list[dict]) -> list[dict]:
-        tm = _load_teachers_manage_module()
-        teachers = getattr(tm, 'normalize_data')(teachers)
-        teachers = getattr(tm, 'merge_teachers_by_name')(teachers)
+        teachers = _tm_normalize_data(teachers)
+        teachers = _tm_merge_teachers_by_name(teachers)
         for t in teachers:
-            getattr(tm, 'normalize_teacher_roles')(t)
-            t['roles'] = sorted(t.get('roles') or [], key=lambda x: _safe_int(x.get('order')))
+            _tm_normalize_teacher_roles(t)
         _enforce_mgmt_order(teachers)
-        for t in teachers:
-            t['roles'] = sorted(t.get('roles') or [], key=lambda x: _safe_int(x.get('order')))
-
-        def teacher_key(tt):
-            orders = [_safe_int(r.get('order')) for r in (tt.get('roles') or [])]
-            return (min(orders) if orders else 10**9, str(tt.get('name') or ''))
 
-        teachers.sort(key=teacher_key)
-        return teachers
+        # roles 排一次就够（放在管理部覆盖之后）；教师排序键也顺手算好，
+        # 避免 sort 的 key 函数在比较期间反复扫 roles
+        decorated: list[tuple[tuple, dict]] = []
+        for t in teachers:
+            roles = sorted(t.get('roles') or [], key=lambda x: _safe_int(x.get('order')))
+            t['roles'] = roles
+            first_order = _safe_int(roles[0].get('order')) if roles else 10**9
+            decorated.append(((first_order, str(t.get('name') or '')), t))
+        decorated.sort(key=lambda item: item[0])
+        return [t for _key, t in decorated]
 
     def _normalize_students(students: list[dict]) -> tuple[list[dict], list[str]]:
-        sm = _load_students_manage_module()
-        norm_line = getattr(sm, 'norm_line')
+        norm_line = _sm_norm_line
 
         if not isinstance(students, list):
             return [], ['students.json 顶层必须是数组(list)']
@@ -859,7 +1508,7 @@ def create_app():
 
         students = sorted(students, key=key)
 
-        ok, errs = getattr(sm, 'validate_data')(students)
+        ok, errs = _sm_validate_data(students)
         return students, ([] if ok else errs)
 
     @app.get('/')
@@ -907,18 +1556,13 @@ def create_app():
     @app.get('/admin')
     @login_required
     def admin_home():
-        teachers = load_json(DATA_TEACHERS)
-        students = load_json(DATA_STUDENTS)
-        students_db = load_json(DATA_STUDENTS_DB)
-        hall_students = load_json(DATA_HALL_OF_FAME)
-        portal_posts = _load_portal_posts()
         return render_template(
             'home.html',
-            teacher_count=len(teachers),
-            student_count=len(students),
-            student_db_count=len(students_db),
-            hall_count=len(hall_students),
-            portal_count=len(portal_posts),
+            teacher_count=_count_json_list(DATA_TEACHERS),
+            student_count=_count_json_list(DATA_STUDENTS),
+            student_db_count=_count_json_list(DATA_STUDENTS_DB),
+            hall_count=_count_json_list(DATA_HALL_OF_FAME),
+            portal_count=_count_json_list(DATA_PORTAL),
         )
 
     @app.get('/healthz')
@@ -1033,23 +1677,13 @@ def create_app():
 
         filtered = [p for p in posts if hit(p)]
 
+        # 置顶在前、组内按时间倒序：reverse=True 时 pinned(True) 排在最前，
+        # ISO8601 字符串按字典序比较即按时间比较，一次排序即可
         def sort_key(p: dict):
-            pinned = 0 if p.get('pinned') else 1
             dt = p.get('publishedAt') or p.get('updatedAt') or ''
-            return (pinned, str(dt))
-
-        filtered.sort(key=sort_key, reverse=False)
-        # pinned first, then time desc
-        filtered = sorted(
-            filtered,
-            key=lambda p: (
-                1 if not p.get('pinned') else 0,
-                str(p.get('publishedAt') or p.get('updatedAt') or ''),
-            ),
-            reverse=False,
-        )
-        # reverse time within groups
-        filtered = list(reversed(filtered))
+            return (bool(p.get('pinned')), str(dt))
+
+        filtered.sort(key=sort_key, reverse=True)
 
         return render_template('portal_list.html', posts=filtered, q=q)
 
@@ -1125,8 +1759,8 @@ def create_app():
     @app.get('/admin/portal/<pid>')
     @login_required
     def portal_edit_page(pid: str):
-        posts = _load_portal_posts()
-        post = _find_post(posts, pid)
+        posts, posts_by_id = _load_portal_posts_indexed()
+        post = _find_post(posts_by_id, pid)
         if not post:
             flash('文章不存在', 'error')
             return redirect(url_for('portal_list_page'))
@@ -1135,8 +1769,8 @@ def create_app():
     @app.post('/admin/portal/<pid>')
     @login_required
     def portal_update_post(pid: str):
-        posts = _load_portal_posts()
-        post = _find_post(posts, pid)
+        posts, posts_by_id = _load_portal_posts_indexed()
+        post = _find_post(posts_by_id, pid)
         if not post:
             flash('文章不存在', 'error')
             return redirect(url_for('portal_list_page'))
@@ -1186,8 +1820,8 @@ def create_app():
     @app.get('/admin/portal/<pid>/preview')
     @login_required
     def portal_preview(pid: str):
-        posts = _load_portal_posts()
-        post = _find_post(posts, pid)
+        _posts, posts_by_id = _load_portal_posts_indexed()
+        post = _find_post(posts_by_id, pid)
         if not post:
             flash('文章不存在', 'error')
             return redirect(url_for('portal_list_page'))
@@ -1204,8 +1838,8 @@ def create_app():
             # still allow poster without QR
             pass
 
-        posts = _load_portal_posts()
-        post = _find_post(posts, pid)
+        _posts, posts_by_id = _load_portal_posts_indexed()
+        post = _find_post(posts_by_id, pid)
         if not post:
             return jsonify({'ok': False, 'error': 'post not found'}), 404
 
@@ -1220,182 +1854,177 @@ def create_app():
             w, h = 1080, 1920
         w = max(720, min(1440, w))
         h = max(1280, min(2560, h))
-
-        if theme == 'minimal':
-            bg = Image.new('RGB', (w, h), (248, 248, 248))
-            accent = (24, 24, 26)
-            text_main = (18, 18, 20)
-            text_muted = (110, 110, 118)
-            brand = (24, 24, 26)
-        else:
-            bg = Image.new('RGB', (w, h), (250, 250, 252))
-            accent = (102, 8, 116)
-            text_main = (20, 20, 22)
-            text_muted = (110, 110, 118)
-            brand = (102, 8, 116)
-        draw = ImageDraw.Draw(bg)
-
-        pad = int(w * 0.065)
-        x0 = pad
-        x1 = w - pad
-        y = pad
-
-        font_title = _pick_cjk_font(int(w * 0.056))
-        font_meta = _pick_cjk_font(int(w * 0.028))
-        font_body = _pick_cjk_font(int(w * 0.032))
-        font_small = _pick_cjk_font(int(w * 0.024))
-
-        def text_bbox(txt: str, font):
-            if not txt:
-                return (0, 0, 0, 0)
-            return draw.textbbox((0, 0), txt, font=font)
-
-        # top accent + card
-        card_r = int(w * 0.04)
-        card = (x0, y, x1, h - pad)
-        draw.rounded_rectangle(card, radius=card_r, fill=(255, 255, 255))
-
-        # accent bar
-        accent_h = max(10, int(w * 0.012))
-        ax0 = x0 + int(w * 0.05)
-        ax1 = x1 - int(w * 0.05)
-        ay0 = y + int(w * 0.05)
-        draw.rounded_rectangle((ax0, ay0, ax1, ay0 + accent_h), radius=accent_h // 2, fill=accent)
-        y = ay0 + accent_h + int(w * 0.04)
-
-        # shift content inward inside card
-        x0c = x0 + int(w * 0.05)
-        x1c = x1 - int(w * 0.05)
-
-        title = str(post.get('title') or '未命名').strip()
-        cat = str(post.get('category') or '').strip()
-        date_s = str(post.get('publishedAt') or post.get('updatedAt') or '').strip()
-        if date_s and 'T' in date_s:
-            date_s = date_s.split('T', 1)[0]
-
-        # title wrap (max 2 lines)
-        title_lines = _wrap_text(draw, title, font_title, x1c - x0c)
-        title_lines = title_lines[:2] if title_lines else ['未命名']
-        for ln in title_lines:
-            draw.text((x0c, y), ln, font=font_title, fill=text_main)
-            y += (text_bbox(ln, font_title)[3] - text_bbox(ln, font_title)[1]) + int(w * 0.012)
-
-        meta_parts = []
-        if cat:
-            meta_parts.append(cat)
-        if date_s:
-            meta_parts.append(date_s)
-        meta = ' · '.join(meta_parts) if meta_parts else '润德信息门户'
-        draw.text((x0c, y), meta, font=font_meta, fill=text_muted)
-        y += (text_bbox(meta, font_meta)[3] - text_bbox(meta, font_meta)[1]) + int(w * 0.03)
-
-        # cover image (optional)
-        cover = str(post.get('coverImage') or '').strip()
-        if cover:
-            im = _load_image_any(cover)
-            if im is not None:
-                cover_h = int(h * 0.28)
-                cover_w = x1c - x0c
-                # crop to fill
-                src_w, src_h = im.size
-                target_ratio = cover_w / cover_h
-                src_ratio = src_w / src_h if src_h else 1
-                if src_ratio > target_ratio:
-                    # wider
-                    new_h = src_h
-                    new_w = int(new_h * target_ratio)
-                    left = (src_w - new_w) // 2
-                    im = im.crop((left, 0, left + new_w, new_h))
-                else:
-                    new_w = src_w
-                    new_h = int(new_w / target_ratio)
-                    top = (src_h - new_h) // 2
-                    im = im.crop((0, top, new_w, top + new_h))
-                im = im.resize((cover_w, cover_h))
-
-                # rounded mask
-                r = int(w * 0.03)
-                mask = Image.new('L', (cover_w, cover_h), 0)
-                md = ImageDraw.Draw(mask)
-                md.rounded_rectangle((0, 0, cover_w, cover_h), radius=r, fill=255)
-                bg.paste(im, (x0c, y), mask)
-                y += cover_h + int(w * 0.03)
-
-        # body text
-        body_html = str(post.get('bodyHtml') or '').strip()
-        body_text = _html_to_text_simple(body_html)
-        if not body_text:
-            body_text = str(post.get('summary') or '').strip()
+        # preview=1：半分辨率出图。排版全部由 w/h 推导，等比缩小后构图不变，
+        # 绘制和 PNG 编码的像素量都降到 1/4，屏幕预览足够清晰
+        if str(request.args.get('preview') or '').strip().lower() in ('1', 'true', 'yes'):
+            w //= 2
+            h //= 2
 
         try:
             max_lines_arg = request.args.get('max_lines')
             max_lines_override = int(max_lines_arg) if max_lines_arg else None
         except Exception:
             max_lines_override = None
+        share_url = str(request.args.get('url') or post.get('shareUrl') or '').strip()
+        show_qr = str(request.args.get('qr') or '1').strip().lower() not in ('0', 'false', 'no')
 
-        max_body_h = (h - pad) - y - int(w * 0.22)
-        line_h = int(w * 0.048)
-        max_lines = max(6, max_body_h // line_h)
-        if max_lines_override is not None:
-            max_lines = max(4, min(40, max_lines_override))
-
-        lines = _wrap_text(draw, body_text, font_body, x1c - x0c)
-        # trim leading empty lines
-        while lines and not lines[0].strip():
-            lines.pop(0)
-
-        truncated = False
-        if len(lines) > max_lines:
-            lines = lines[:max_lines]
-            truncated = True
-
-        for ln in lines:
-            if not ln:
-                y += int(line_h * 0.65)
-                continue
-            draw.text((x0c, y), ln, font=font_body, fill=(35, 35, 38) if theme == 'brand' else text_main)
-            y += line_h
+        # 渲染放进有界线程池：request 上下文相关的参数已在上面取好
+        def _render() -> io.BytesIO:
+            if theme == 'minimal':
+                text_main = (18, 18, 20)
+                text_muted = (110, 110, 118)
+                brand = (24, 24, 26)
+            else:
+                text_main = (20, 20, 22)
+                text_muted = (110, 110, 118)
+                brand = (102, 8, 116)
+            # 背景/白卡/色条是纯静态内容，直接取预渲染底图
+            bg = _base_poster(theme, w, h)
+            draw = ImageDraw.Draw(bg)
+
+            pad = int(w * 0.065)
+            x0 = pad
+            x1 = w - pad
+            y = pad
+
+            font_title = _pick_cjk_font(int(w * 0.056))
+            font_meta = _pick_cjk_font(int(w * 0.028))
+            font_body = _pick_cjk_font(int(w * 0.032))
+            font_small = _pick_cjk_font(int(w * 0.024))
+
+            def text_bbox(txt: str, font):
+                if not txt:
+                    return (0, 0, 0, 0)
+                return draw.textbbox((0, 0), txt, font=font)
+
+            # 接着底图上色条下方开始排版
+            accent_h = max(10, int(w * 0.012))
+            ay0 = y + int(w * 0.05)
+            y = ay0 + accent_h + int(w * 0.04)
+
+            # shift content inward inside card
+            x0c = x0 + int(w * 0.05)
+            x1c = x1 - int(w * 0.05)
+
+            title = str(post.get('title') or '未命名').strip()
+            cat = str(post.get('category') or '').strip()
+            date_s = str(post.get('publishedAt') or post.get('updatedAt') or '').strip()
+            if date_s and 'T' in date_s:
+                date_s = date_s.split('T', 1)[0]
+
+            # title wrap (max 2 lines)
+            title_lines = _wrap_text(draw, title, font_title, x1c - x0c)
+            title_lines = title_lines[:2] if title_lines else ['未命名']
+            for ln in title_lines:
+                draw.text((x0c, y), ln, font=font_title, fill=text_main)
+                y += (text_bbox(ln, font_title)[3] - text_bbox(ln, font_title)[1]) + int(w * 0.012)
+
+            meta_parts = []
+            if cat:
+                meta_parts.append(cat)
+            if date_s:
+                meta_parts.append(date_s)
+            meta = ' · '.join(meta_parts) if meta_parts else '润德信息门户'
+            draw.text((x0c, y), meta, font=font_meta, fill=text_muted)
+            y += (text_bbox(meta, font_meta)[3] - text_bbox(meta, font_meta)[1]) + int(w * 0.03)
+
+            # cover image (optional)
+            cover = str(post.get('coverImage') or '').strip()
+            if cover:
+                cover_h = int(h * 0.28)
+                cover_w = x1c - x0c
+                # JPEG 源图直接按目标的 2 倍草稿解码，避免全分辨率解码再缩
+                im = _load_image_any(cover, draft_size=(cover_w * 2, cover_h * 2))
+                if im is not None:
+                    # fit = 居中裁剪 + 缩放一次完成；BILINEAR 对缩小封面已足够
+                    im = ImageOps.fit(im, (cover_w, cover_h), Image.BILINEAR)
+
+                    # rounded mask（同尺寸可复用，paste 只读不改）
+                    r = int(w * 0.03)
+                    bg.paste(im, (x0c, y), _rounded_mask(cover_w, cover_h, r))
+                    y += cover_h + int(w * 0.03)
+
+            # body text
+            body_html = str(post.get('bodyHtml') or '').strip()
+            body_text = _html_to_text_simple(body_html)
+            if not body_text:
+                body_text = str(post.get('summary') or '').strip()
+
+
+            max_body_h = (h - pad) - y - int(w * 0.22)
+            line_h = int(w * 0.048)
+            max_lines = max(6, max_body_h // line_h)
+            if max_lines_override is not None:
+                max_lines = max(4, min(40, max_lines_override))
+
+            lines = _wrap_text(draw, body_text, font_body, x1c - x0c)
+            # trim leading empty lines
+            while lines and not lines[0].strip():
+                lines.pop(0)
+
+            truncated = False
+            if len(lines) > max_lines:
+                lines = lines[:max_lines]
+                truncated = True
+
+            # 正文不画进页脚区：越界的行直接停，不再付 freetype 渲染成本
+            body_floor_y = (h - pad) - int(w * 0.16) - int(w * 0.02)
+            body_fill = (35, 35, 38) if theme == 'brand' else text_main
+            for ln in lines:
+                if not ln:
+                    y += int(line_h * 0.65)
+                    continue
+                if y + line_h > body_floor_y:
+                    truncated = True
+                    break
+                draw.text((x0c, y), ln, font=font_body, fill=body_fill)
+                y += line_h
+
+            if truncated:
+                ell = '（更多内容请在官网信息门户查看）'
+                draw.text((x0c, y + int(w * 0.01)), ell, font=font_small, fill=brand)
+                y += int(w * 0.06)
+
+            # footer: optional QR + caption
+            qr_size = int(w * 0.22)
+            footer_y = (h - pad) - int(w * 0.16)
+            if show_qr and share_url:
+                qr_img = _make_qr(share_url, size=qr_size)
+                if qr_img is not None:
+                    qx = x1c - qr_size
+                    qy = footer_y
+                    # white background for QR
+                    r = int(w * 0.018)
+                    draw.rounded_rectangle((qx - int(w * 0.012), qy - int(w * 0.012), qx + qr_size + int(w * 0.012), qy + qr_size + int(w * 0.012)), radius=r, fill=(255, 255, 255), outline=(0, 0, 0, 18))
+                    bg.paste(qr_img, (qx, qy))
+
+                    cap = '扫码查看原文'
+                    if hasattr(font_small, 'getlength'):
+                        # 固定文案 + 按字号复用的字体对象：宽度查一次缓存即可
+                        cap_w = _text_w(font_small, cap)
+                    else:
+                        cap_w = draw.textlength(cap, font=font_small) if hasattr(draw, 'textlength') else text_bbox(cap, font_small)[2]
+                    draw.text((qx + (qr_size - cap_w) / 2, qy + qr_size + int(w * 0.01)), cap, font=font_small, fill=text_muted)
 
-        if truncated:
-            ell = '（更多内容请在官网信息门户查看）'
-            draw.text((x0c, y + int(w * 0.01)), ell, font=font_small, fill=brand)
-            y += int(w * 0.06)
+            # 固定页脚文案已在 _base_poster 预渲染
+            if share_url:
+                # show short hostname
+                try:
+                    host = urllib.parse.urlparse(share_url).netloc
+                except Exception:
+                    host = ''
+                if host:
+                    draw.text((x0c, h - pad - int(w * 0.045)), host, font=font_small, fill=brand)
 
-        # footer: optional QR + caption
-        share_url = str(request.args.get('url') or post.get('shareUrl') or '').strip()
-        show_qr = str(request.args.get('qr') or '1').strip().lower() not in ('0', 'false', 'no')
-        qr_size = int(w * 0.22)
-        footer_y = (h - pad) - int(w * 0.16)
-        if show_qr and share_url:
-            qr_img = _make_qr(share_url, size=qr_size)
-            if qr_img is not None:
-                qx = x1c - qr_size
-                qy = footer_y
-                # white background for QR
-                r = int(w * 0.018)
-                draw.rounded_rectangle((qx - int(w * 0.012), qy - int(w * 0.012), qx + qr_size + int(w * 0.012), qy + qr_size + int(w * 0.012)), radius=r, fill=(255, 255, 255), outline=(0, 0, 0, 18))
-                bg.paste(qr_img, (qx, qy))
-
-                cap = '扫码查看原文'
-                cap_w = draw.textlength(cap, font=font_small) if hasattr(draw, 'textlength') else text_bbox(cap, font_small)[2]
-                draw.text((qx + (qr_size - cap_w) / 2, qy + qr_size + int(w * 0.01)), cap, font=font_small, fill=text_muted)
-
-        footer = '兰州润德艺术学校 · 信息门户'
-        draw.text((x0c, h - pad - int(w * 0.08)), footer, font=font_small, fill=text_muted)
-        if share_url:
-            # show short hostname
-            try:
-                host = urllib.parse.urlparse(share_url).netloc
-            except Exception:
-                host = ''
-            if host:
-                draw.text((x0c, h - pad - int(w * 0.045)), host, font=font_small, fill=brand)
+            out = io.BytesIO()
+            # 海报是一次性下载，不做长期存档：低压缩级别把编码 CPU 换成略大的文件
+            bg.save(out, format='PNG', compress_level=1)
+            out.seek(0)
+            return out
 
-        out = io.BytesIO()
-        bg.save(out, format='PNG', optimize=True)
-        out.seek(0)
+        out = _POSTER_POOL.submit(_render).result(timeout=30)
 
-        safe_title = _safe_filename(title)
+        safe_title = _safe_filename(str(post.get('title') or '未命名').strip())
         fname = f'poster_{pid}_{safe_title}.png'
         return send_file(out, as_attachment=True, download_name=fname, mimetype='image/png')
 
@@ -1404,21 +2033,22 @@ def create_app():
     def portal_upload_image():
         f = request.files.get('image')
         if not f or not getattr(f, 'filename', None):
-            return jsonify({'ok': False, 'error': 'missing image'}), 400
+            return _json({'ok': False, 'error': 'missing image'}, 400)
 
         orig = str(f.filename or '')
         ext = (Path(orig).suffix or '').lower()
-        if ext not in {'.jpg', '.jpeg', '.png', '.webp'}:
-            return jsonify({'ok': False, 'error': 'unsupported image type'}), 400
+        if ext not in _ALLOWED_IMG_EXT:
+            return _json({'ok': False, 'error': 'unsupported image type'}, 400)
 
-        yyyymm = datetime.datetime.now().strftime('%Y%m')
+        now = datetime.datetime.now()
+        yyyymm = f'{now.year:04d}{now.month:02d}'
         dest_dir = _PORTAL_ASSETS_ROOT / yyyymm
         # GitHub 存储模式下无需 mkdir（API 会创建路径），本地模式仍创建目录
         if not _github_enabled():
             dest_dir.mkdir(parents=True, exist_ok=True)
 
         safe_base = _safe_filename(Path(orig).stem)
-        ts = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
+        ts = _now_stamp(now)
         name = f'{ts}_{safe_base}{ext}'
         dest = dest_dir / name
 
@@ -1433,13 +2063,13 @@ def create_app():
             rel = f'assets/portal/{yyyymm}/{name}'
             repo_path = f'public/{rel}'
             _gh_put_file(repo_path, data, message=f'上传门户图片 {repo_path}')
-            return jsonify({'ok': True, 'path': rel})
+            return _json({'ok': True, 'path': rel})
 
         with dest.open('wb') as w:
-            shutil.copyfileobj(f.stream, w)
+            _copy_stream(f.stream, w)
 
         rel = f'assets/portal/{yyyymm}/{name}'
-        return jsonify({'ok': True, 'path': rel})
+        return _json({'ok': True, 'path': rel})
 
     @app.post('/admin/upload-photo')
     @login_required
@@ -1450,16 +2080,16 @@ def create_app():
         """
         f = request.files.get('image')
         if not f or not getattr(f, 'filename', None):
-            return jsonify({'ok': False, 'error': 'missing image'}), 400
+            return _json({'ok': False, 'error': 'missing image'}, 400)
 
         kind = str(request.form.get('kind') or request.args.get('kind') or 'teacher').strip().lower()
         if kind not in {'teacher', 'student', 'admission'}:
-            return jsonify({'ok': False, 'error': 'invalid kind'}), 400
+            return _json({'ok': False, 'error': 'invalid kind'}, 400)
 
         orig = str(f.filename or '')
         ext = (Path(orig).suffix or '').lower()
-        if ext not in {'.jpg', '.jpeg', '.png', '.webp'}:
-            return jsonify({'ok': False, 'error': 'unsupported image type'}), 400
+        if ext not in _ALLOWED_IMG_EXT:
+            return _json({'ok': False, 'error': 'unsupported image type'}, 400)
 
         if kind == 'teacher':
             rel_dir = 'photos'
@@ -1469,7 +2099,7 @@ def create_app():
             rel_dir = 'students/admissions'
 
         safe_base = _safe_filename(Path(orig).stem)
-        ts = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
+        ts = _now_stamp()
         name = f'{ts}_{safe_base}{ext}'
         rel = f'{rel_dir}/{name}'
 
@@ -1482,7 +2112,7 @@ def create_app():
             data = f.stream.read()
             repo_path = f'public/{rel}'.lstrip('/')
             _gh_put_file(repo_path, data, message=f'上传图片 {repo_path}')
-            return jsonify({'ok': True, 'path': rel})
+            return _json({'ok': True, 'path': rel})
 
         # local file mode
         if _SITE_MODE in {'public', 'deploy', 'cloud'}:
@@ -1492,9 +2122,9 @@ def create_app():
         dest.parent.mkdir(parents=True, exist_ok=True)
 
         with dest.open('wb') as w:
-            shutil.copyfileobj(f.stream, w)
+            _copy_stream(f.stream, w)
 
-        return jsonify({'ok': True, 'path': rel})
+        return _json({'ok': True, 'path': rel})
 
     @app.post('/admin/ocr-upload')
     @login_required
@@ -1502,15 +2132,15 @@ def create_app():
         """Upload raw OCR screenshot to data/raw_ocr (admin only)."""
         f = request.files.get('image')
         if not f or not getattr(f, 'filename', None):
-            return jsonify({'ok': False, 'error': 'missing image'}), 400
+            return _json({'ok': False, 'error': 'missing image'}, 400)
 
         orig = str(f.filename or '')
         ext = (Path(orig).suffix or '').lower()
-        if ext not in {'.jpg', '.jpeg', '.png', '.webp'}:
-            return jsonify({'ok': False, 'error': 'unsupported image type'}), 400
+        if ext not in _ALLOWED_IMG_EXT:
+            return _json({'ok': False, 'error': 'unsupported image type'}, 400)
 
         safe_base = _safe_filename(Path(orig).stem)
-        ts = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
+        ts = _now_stamp()
         name = f'{ts}_{safe_base}{ext}'
         rel = f'data/raw_ocr/{name}'
 
@@ -1523,14 +2153,14 @@ def create_app():
             data = f.stream.read()
             repo_path = rel
             _gh_put_file(repo_path, data, message=f'上传 OCR 原图 {repo_path}')
-            return jsonify({'ok': True, 'path': rel})
+            return _json({'ok': True, 'path': rel})
 
         dest = ROOT / rel
         dest.parent.mkdir(parents=True, exist_ok=True)
         with dest.open('wb') as w:
-            shutil.copyfileobj(f.stream, w)
+            _copy_stream(f.stream, w)
 
-        return jsonify({'ok': True, 'path': rel})
+        return _json({'ok': True, 'path': rel})
 
     @app.post('/admin/ocr-recognize')
     @login_required
@@ -1587,7 +2217,7 @@ def create_app():
         try:
             rp = _norm_json_path(relpath)
         except Exception:
-            return jsonify({'ok': False, 'error': 'invalid path'}), 400
+            return _json({'ok': False, 'error': 'invalid path'}, 400)
 
         allow_prefixes = (
             'assets/portal/',
@@ -1605,14 +2235,14 @@ def create_app():
             'data/raw_ocr',
         }
         if not (rp in allow_exact or any(rp.startswith(pfx) for pfx in allow_prefixes)):
-            return jsonify({'ok': False, 'error': 'forbidden'}), 403
+            return _json({'ok': False, 'error': 'forbidden'}, 403)
 
         # GitHub 存储模式：直接从仓库读取并代理返回
         if _github_enabled():
             repo_path = f'public/{rp}'.lstrip('/')
             content, _sha = _gh_get_file(repo_path)
             if not content:
-                return jsonify({'ok': False, 'error': 'not found'}), 404
+                return _json({'ok': False, 'error': 'not found'}, 404)
             # naive mimetype
             suffix = Path(rp).suffix.lower()
             mimetype = 'application/octet-stream'
@@ -1631,7 +2261,7 @@ def create_app():
             p = ROOT / rp
 
         if not p.exists() or not p.is_file():
-            return jsonify({'ok': False, 'error': 'not found'}), 404
+            return _json({'ok': False, 'error': 'not found'}, 404)
 
         return send_file(p)
 
@@ -1760,7 +2390,7 @@ def create_app():
                         if not (p.startswith('teachers/photos/') or p.startswith('photos/')):
                             errors.append(f'teachers.json {tid} photo 必须写 teachers/photos/...')
                         else:
-                            fn = Path(p).name
+                            fn = _basename(p)
                             tt['photo'] = f'photos/{fn}'
                             # locate source file in upload
                             src1 = f'teachers/photos/{fn}'
@@ -1772,7 +2402,7 @@ def create_app():
                                 errors.append(f'teachers.json {tid} 照片后缀不支持：{fn}')
                             else:
                                 if not dry_run and not errors:
-                                    _save_uploaded_file(m, src, ROOT / 'photos' / fn)
+                                    _save_uploaded_file(m[src], ROOT / 'photos' / fn)
                                 files_copied += 1
 
                 normalized.append(tt)
@@ -1792,14 +2422,9 @@ def create_app():
                 'warnings': warnings,
             })
 
-        # merge/replace into data
-        existing = load_json(DATA_TEACHERS)
-        existing, created, updated = _merge_by_id(existing, normalized, mode=mode)
-        existing = _normalize_all_teachers(existing)
-        _enforce_mgmt_order(existing)
-
-        if not dry_run:
-            write_json(DATA_TEACHERS, existing)
+        # merge/replace into data（合并+写盘在导入队列里串行执行）
+        created, updated = _commit_import(DATA_TEACHERS, normalized, mode=mode,
+                                          finalize=_finalize_teachers, dry_run=dry_run)
 
         return render_template('bulk_import.html', result={
             'ok': True,
@@ -1866,14 +2491,14 @@ def create_app():
                         if not p.startswith('students/photos/'):
                             errors.append(f'students.json {sid} photo 必须写 students/photos/...')
                         else:
-                            fn = Path(p).name
+                            fn = _basename(p)
                             if not _is_allowed_image(fn):
                                 errors.append(f'students.json {sid} photo 后缀不支持：{fn}')
                             elif p not in m:
                                 errors.append(f'students.json {sid} 缺少照片文件：{p}')
                             else:
                                 if not dry_run and not errors:
-                                    _save_uploaded_file(m, p, ROOT / 'students' / 'photos' / fn)
+                                    _save_uploaded_file(m[p], ROOT / 'students' / 'photos' / fn)
                                 files_copied += 1
                             ss['photo'] = f'students/photos/{fn}'
 
@@ -1901,7 +2526,7 @@ def create_app():
                     if not p.startswith('students/admissions/'):
                         errors.append(f'students.json {sid} admissions[{ai}].image 必须写 students/admissions/...')
                         continue
-                    fn = Path(p).name
+                    fn = _basename(p)
                     if not _is_allowed_image(fn):
                         errors.append(f'students.json {sid} admissions[{ai}] 后缀不支持：{fn}')
                         continue
@@ -1909,7 +2534,7 @@ def create_app():
                         errors.append(f'students.json {sid} 缺少 admissions 文件：{p}')
                         continue
                     if not dry_run and not errors:
-                        _save_uploaded_file(m, p, ROOT / 'students' / 'admissions' / fn)
+                        _save_uploaded_file(m[p], ROOT / 'students' / 'admissions' / fn)
                     files_copied += 1
 
                     new_adm.append({
@@ -1924,8 +2549,7 @@ def create_app():
 
         # validate using students/manage.py rules
         if not errors:
-            sm = _load_students_manage_module()
-            ok, errs = getattr(sm, 'validate_data')(normalized)
+            ok, errs = _sm_validate_data(normalized)
             if not ok:
                 errors.extend(errs)
 
@@ -1942,12 +2566,8 @@ def create_app():
                 'warnings': warnings,
             })
 
-        existing = load_json(DATA_STUDENTS)
-        existing, created, updated = _merge_by_id(existing, normalized, mode=mode)
-        # keep a stable order: year desc, name asc
-        existing.sort(key=lambda x: (-_safe_int(x.get('year'), default=0), str(x.get('name') or '')))
-        if not dry_run:
-            write_json(DATA_STUDENTS, existing)
+        created, updated = _commit_import(DATA_STUDENTS, normalized, mode=mode,
+                                          finalize=_finalize_students, dry_run=dry_run)
 
         return render_template('bulk_import.html', result={
             'ok': True,
@@ -1979,6 +2599,10 @@ def create_app():
         folder_files = request.files.getlist('files')
         folder_pack = _normalize_webkitdirectory_upload(folder_files)
         folder_map = folder_pack['files']
+        # 文件名→完整键的索引建一次，循环里不再整表扫描
+        by_base = _basename_index(folder_map) if folder_map else {}
+        # 复制计划：行循环里只登记 (源, 目标)，校验全过后统一并行落盘
+        copies: list[tuple[str, Path]] = []
 
         if not f or not getattr(f, 'filename', ''):
             errors.append('请上传 .xlsx 文件')
@@ -2041,7 +2665,7 @@ def create_app():
             if 'achievements' in r and r.get('achievements') is not None:
                 raw = str(r.get('achievements') or '').strip()
                 if raw:
-                    parts = [x.strip() for x in re.split(r'[\n\|]+', raw) if x and x.strip()]
+                    parts = [x.strip() for x in raw.translate(_ACH_TRANS).split('|') if x.strip()]
                     t['achievements'] = parts
 
             dept = str(r.get('department') or '').strip() if 'department' in r else ''
@@ -2069,7 +2693,7 @@ def create_app():
                     p = ''
                 if p:
                     if p.startswith('teachers/photos/') or p.startswith('photos/'):
-                        fn = Path(p).name
+                        fn = _basename(p)
                         t['photo'] = f'photos/{fn}'
 
                         # If folder uploaded, try to copy. Otherwise, only warn if missing.
@@ -2083,17 +2707,18 @@ def create_app():
                             elif cand2 in folder_map:
                                 src = cand2
                             else:
-                                src = _find_upload_by_basename(folder_map, fn) or ''
-                                # ambiguous matches
-                                if not src and any(Path(k).name == fn for k in folder_map.keys()):
+                                cands = by_base.get(fn) or ()
+                                if len(cands) == 1:
+                                    src = cands[0]
+                                elif cands:
+                                    # ambiguous matches
                                     errors.append(f'{tid} photo 文件名重复，无法确定用哪个：{fn}（请保证唯一）')
 
                             if not src:
                                 errors.append(f'{tid} photo 在上传文件夹中找不到：{p}')
                             else:
                                 if not dry_run:
-                                    _save_uploaded_file(folder_map, src, ROOT / 'photos' / fn)
-                                    files_copied += 1
+                                    copies.append((src, ROOT / 'photos' / fn))
                         else:
                             if not (ROOT / 'photos' / fn).exists():
                                 warnings.append(f'{tid} photo 文件不存在于项目：photos/{fn}（可在 Excel 表单同时上传文件夹自动复制）')
@@ -2117,12 +2742,9 @@ def create_app():
                 'warnings': warnings,
             })
 
-        existing = load_json(DATA_TEACHERS)
-        existing, created, updated = _merge_by_id(existing, normalized, mode=mode)
-        existing = _normalize_all_teachers(existing)
-        _enforce_mgmt_order(existing)
-        if not dry_run:
-            write_json(DATA_TEACHERS, existing)
+        files_copied += _run_copy_plan(folder_map, copies)
+        created, updated = _commit_import(DATA_TEACHERS, normalized, mode=mode,
+                                          finalize=_finalize_teachers, dry_run=dry_run)
 
         return render_template('bulk_import.html', result={
             'ok': True,
@@ -2154,6 +2776,10 @@ def create_app():
         folder_files = request.files.getlist('files')
         folder_pack = _normalize_webkitdirectory_upload(folder_files)
         folder_map = folder_pack['files']
+        # 文件名→完整键的索引建一次，循环里不再整表扫描
+        by_base = _basename_index(folder_map) if folder_map else {}
+        # 复制计划：行循环里只登记 (源, 目标)，校验全过后统一并行落盘
+        copies: list[tuple[str, Path]] = []
 
         if not f or not getattr(f, 'filename', ''):
             errors.append('请上传 .xlsx 文件')
@@ -2204,15 +2830,10 @@ def create_app():
                 errors.append(f'第 {i+2} 行缺少必要字段（id/name/school/major/year）')
                 continue
 
-            s = agg.get(sid) or {
-                'id': sid,
-                'name': name,
-                'school': school,
-                'major': major,
-                'year': year,
-                'photo': '',
-                'admissions': [],
-            }
+            s = agg.get(sid)
+            if s is None:
+                # 新 id 只建骨架，字段统一由下面的赋值填，避免建完又整份覆盖
+                s = agg[sid] = {'id': sid, 'photo': '', 'admissions': []}
             s['name'] = name
             s['school'] = school
             s['major'] = major
@@ -2234,7 +2855,7 @@ def create_app():
                     if not p.startswith('students/admissions/'):
                         errors.append(f'{sid} admissions image 必须写 students/admissions/...')
                     else:
-                        fn = Path(p).name
+                        fn = _basename(p)
                         if not _is_allowed_image(fn):
                             errors.append(f'{sid} admissions 后缀不支持：{fn}')
                         else:
@@ -2243,20 +2864,20 @@ def create_app():
                                 if p in folder_map:
                                     src = p
                                 else:
-                                    src = _find_upload_by_basename(folder_map, fn) or ''
-                                    if not src and any(Path(k).name == fn for k in folder_map.keys()):
+                                    cands = by_base.get(fn) or ()
+                                    if len(cands) == 1:
+                                        src = cands[0]
+                                    elif cands:
                                         errors.append(f'{sid} admissions 文件名重复，无法确定用哪个：{fn}（请保证唯一）')
                                 if not src:
                                     errors.append(f'{sid} admissions 在上传文件夹中找不到：{p}')
                                 else:
                                     if not dry_run:
-                                        _save_uploaded_file(folder_map, src, ROOT / 'students' / 'admissions' / fn)
-                                        files_copied += 1
+                                        copies.append((src, ROOT / 'students' / 'admissions' / fn))
                             else:
                                 if not (ROOT / 'students' / 'admissions' / fn).exists():
                                     warnings.append(f'{sid} admissions 文件不存在于项目：students/admissions/{fn}（可在 Excel 表单同时上传文件夹自动复制）')
-                            s.setdefault('admissions', []).append({'image': f'students/admissions/{fn}', 'watermarked': adm_wm, 'note': adm_note})
-            agg[sid] = s
+                            s['admissions'].append({'image': f'students/admissions/{fn}', 'watermarked': adm_wm, 'note': adm_note})
 
         normalized: list[dict] = []
         for sid, s in agg.items():
@@ -2271,7 +2892,7 @@ def create_app():
                     if not p.startswith('students/photos/'):
                         errors.append(f'{sid} photo 必须写 students/photos/...')
                     else:
-                        fn = Path(p).name
+                        fn = _basename(p)
                         if not _is_allowed_image(fn):
                             errors.append(f'{sid} photo 后缀不支持：{fn}')
                         else:
@@ -2280,15 +2901,16 @@ def create_app():
                                 if p in folder_map:
                                     src = p
                                 else:
-                                    src = _find_upload_by_basename(folder_map, fn) or ''
-                                    if not src and any(Path(k).name == fn for k in folder_map.keys()):
+                                    cands = by_base.get(fn) or ()
+                                    if len(cands) == 1:
+                                        src = cands[0]
+                                    elif cands:
                                         errors.append(f'{sid} photo 文件名重复，无法确定用哪个：{fn}（请保证唯一）')
                                 if not src:
                                     errors.append(f'{sid} photo 在上传文件夹中找不到：{p}')
                                 else:
                                     if not dry_run:
-                                        _save_uploaded_file(folder_map, src, ROOT / 'students' / 'photos' / fn)
-                                        files_copied += 1
+                                        copies.append((src, ROOT / 'students' / 'photos' / fn))
                             else:
                                 if not (ROOT / 'students' / 'photos' / fn).exists():
                                     warnings.append(f'{sid} photo 文件不存在于项目：students/photos/{fn}（可在 Excel 表单同时上传文件夹自动复制）')
@@ -2298,8 +2920,7 @@ def create_app():
         records = len(normalized)
 
         if not errors:
-            sm = _load_students_manage_module()
-            ok, errs = getattr(sm, 'validate_data')(normalized)
+            ok, errs = _sm_validate_data(normalized)
             if not ok:
                 errors.extend(errs)
 
@@ -2316,11 +2937,9 @@ def create_app():
                 'warnings': warnings,
             })
 
-        existing = load_json(DATA_STUDENTS)
-        existing, created, updated = _merge_by_id(existing, normalized, mode=mode)
-        existing.sort(key=lambda x: (-_safe_int(x.get('year'), default=0), str(x.get('name') or '')))
-        if not dry_run:
-            write_json(DATA_STUDENTS, existing)
+        files_copied += _run_copy_plan(folder_map, copies)
+        created, updated = _commit_import(DATA_STUDENTS, normalized, mode=mode,
+                                          finalize=_finalize_students, dry_run=dry_run)
 
         return render_template('bulk_import.html', result={
             'ok': True,
@@ -2337,43 +2956,51 @@ def create_app():
     @app.get('/admin/teachers')
     @login_required
     def teachers_list():
-        teachers = load_json(DATA_TEACHERS)
+        # 纯展示路由：共享缓存视图，不做 deepcopy
+        teachers = load_json_ro(DATA_TEACHERS)
 
         teacher_count = len(teachers)
 
-        # 统一管理页：按部门聚合岗位卡片（同一老师跨部门会出现多张卡片）
-        dept_map: dict[str, list[dict]] = {}
+        # 统一管理页：按部门聚合岗位卡片（同一老师跨部门会出现多张卡片）；
+        # 最小 order 随聚合顺手记下，省掉后面按部门重扫一遍
+        dept_map: dict[str, list[dict]] = defaultdict(list)
+        dept_min: dict[str, int] = {}
         for t in teachers:
-            for r in (t.get('roles') or []):
-                dept = str(r.get('department') or '').strip()
-                pos = str(r.get('position') or '').strip()
+            roles = t.get('roles')
+            if not roles:
+                continue
+            # 老师级字段在外层取好，内层每个 role 不再重复查 dict
+            tid = t.get('id')
+            name = t.get('name')
+            photo = t.get('photo') or ''
+            short = t.get('shortSummary') or ''
+            for r in roles:
+                dept = _dept(r)
+                pos = _pos(r)
                 if not dept or not pos:
                     continue
-                dept_map.setdefault(dept, []).append({
+                order = _safe_int(r.get('order'))
+                dept_map[dept].append({
                     'roleKey': _role_key(t, r),
-                    'teacherId': t.get('id'),
-                    'name': t.get('name'),
-                    'photo': t.get('photo') or '',
-                    'shortSummary': t.get('shortSummary') or '',
+                    'teacherId': tid,
+                    'name': name,
+                    'photo': photo,
+                    'shortSummary': short,
                     'department': dept,
                     'position': pos,
-                    'order': _safe_int(r.get('order')),
+                    'order': order,
                 })
+                if order < dept_min.get(dept, 10**9):
+                    dept_min[dept] = order
 
-        # 部门顺序：按该部门最小 order；舞蹈部置底
-        def dept_key(item):
-            dept, roles = item
-            min_order = min((x.get('order', 10**9) for x in roles), default=10**9)
-            dance_last = 1 if dept == '舞蹈部' else 0
-            return (dance_last, min_order, dept)
-
+        # 部门顺序：按该部门最小 order；舞蹈部置底。先排部门再排卡片，各排一次
+        ordered = sorted(dept_map.items(),
+                         key=lambda kv: (1 if kv[0] == '舞蹈部' else 0, dept_min.get(kv[0], 10**9), kv[0]))
         depts = []
-        for dept, roles in dept_map.items():
-            roles.sort(key=lambda x: (_safe_int(x.get('order')), str(x.get('name') or '')))
+        for dept, roles in ordered:
+            roles.sort(key=lambda x: (x['order'], str(x.get('name') or '')))
             depts.append({'department': dept, 'roles': roles})
 
-        depts.sort(key=lambda d: dept_key((d['department'], d['roles'])))
-
         role_card_count = sum(len(d.get('roles') or []) for d in depts)
         return render_template('teachers_manage.html', depts=depts, teacher_count=teacher_count, role_card_count=role_card_count)
 
@@ -2393,52 +3020,53 @@ def create_app():
             return jsonify({'ok': False, 'error': 'bad payload'}), 400
 
         teachers = load_json(DATA_TEACHERS)
+        roles_in_dept = _index_by_dept(teachers).get(dept, [])
 
         # 收集该部门当前 order 的最小值作为基准，保持部门整体排序区间不剧烈变化
-        cur_orders = []
-        for t in teachers:
-            for r in (t.get('roles') or []):
-                if str(r.get('department') or '').strip() == dept:
-                    cur_orders.append(_safe_int(r.get('order')))
-        base = min(cur_orders) if cur_orders else 1
+        base = min((_safe_int(r.get('order')) for _t, r in roles_in_dept), default=1)
 
         wanted = [str(k) for k in role_keys]
         wanted_set = set(wanted)
         updated = 0
 
+        # roleKey → (teacher, role)：写回时 O(1) 定位（跳过无 id 的脏数据，与整表扫描时一致）
+        by_key = {_role_key(t, r): (t, r) for t, r in roles_in_dept if t.get('id')}
+        dirty_tids: set = set()
+
         # 写回顺序（只影响该部门的 role）
         idx = 0
         for rk in wanted:
-            for t in teachers:
-                if not t.get('id'):
-                    continue
-                for r in (t.get('roles') or []):
-                    if str(r.get('department') or '').strip() != dept:
-                        continue
-                    if _role_key(t, r) == rk:
-                        r['order'] = int(base + idx)
-                        idx += 1
-                        updated += 1
-                        break
+            hit = by_key.get(rk)
+            if hit is not None:
+                t, r = hit
+                r['order'] = int(base + idx)
+                dirty_tids.add(t.get('id'))
+                idx += 1
+                updated += 1
 
         # 未出现在 roleKeys 里的同部门条目，按原顺序跟在后面（防止丢失）
         rest = []
-        for t in teachers:
-            for r in (t.get('roles') or []):
-                if str(r.get('department') or '').strip() != dept:
-                    continue
-                if _role_key(t, r) not in wanted_set:
-                    rest.append((_safe_int(r.get('order')), _role_key(t, r), r))
+        for t, r in roles_in_dept:
+            if _role_key(t, r) not in wanted_set:
+                rest.append((_safe_int(r.get('order')), _role_key(t, r), t, r))
         rest.sort(key=lambda x: x[0])
-        for _, _, r in rest:
+        for _, _, t, r in rest:
             r['order'] = int(base + idx)
+            dirty_tids.add(t.get('id'))
             idx += 1
             updated += 1
 
+        if not updated:
+            # 部门里没有任何条目被动到，不必整文件重写
+            return jsonify({'ok': True, 'updated': 0, 'base': base})
+
+        # 角色重排只影响被动过的老师，其余保持原序不再逐个重排；
+        # 就地 sort 省掉 sorted 的新列表分配
         for t in teachers:
-            t['roles'] = sorted(t.get('roles') or [], key=lambda x: _safe_int(x.get('order')))
+            if t.get('id') in dirty_tids and t.get('roles'):
+                t['roles'].sort(key=lambda x: _safe_int(x.get('order')))
 
-        write_json(DATA_TEACHERS, teachers)
+        _schedule_write(DATA_TEACHERS, teachers)
         return jsonify({'ok': True, 'updated': updated, 'base': base})
 
     @app.post('/admin/teachers/departments/add-random')
@@ -2450,24 +3078,17 @@ def create_app():
             return jsonify({'ok': False, 'error': 'missing department'}), 400
 
         teachers = load_json(DATA_TEACHERS)
+        teacher_depts, dept_max = _teacher_dept_stats()
 
         # 只从“当前部门还没有岗位”的老师里随机挑一个，避免同部门重复出现同一个人
-        candidates: list[dict] = []
-        for t in teachers:
-            rs = t.get('roles') or []
-            has_dept = any(str(r.get('department') or '').strip() == dept for r in rs)
-            if not has_dept:
-                candidates.append(t)
+        candidates = [t for t in teachers
+                      if dept not in teacher_depts.get(str(t.get('id') or '').strip(), ())]
 
         if not candidates:
             return jsonify({'ok': False, 'error': 'no available teacher for this department'}), 400
 
         # 该部门的新 order 放到末尾
-        max_order = 0
-        for t in teachers:
-            for r in (t.get('roles') or []):
-                if str(r.get('department') or '').strip() == dept:
-                    max_order = max(max_order, _safe_int(r.get('order'), default=0))
+        max_order = dept_max.get(dept, 0)
 
         t = random.choice(candidates)
         new_role = {
@@ -2499,7 +3120,8 @@ def create_app():
         if not dept:
             return jsonify({'ok': False, 'error': 'missing department'}), 400
 
-        teachers = load_json(DATA_TEACHERS)
+        teachers = load_json_ro(DATA_TEACHERS)
+        teacher_depts, _dept_max = _teacher_dept_stats()
         out: list[dict] = []
 
         for t in teachers:
@@ -2507,9 +3129,7 @@ def create_app():
             if not tid:
                 continue
             name = str(t.get('name') or '').strip()
-            rs = t.get('roles') or []
-            has_dept = any(str(r.get('department') or '').strip() == dept for r in rs)
-            if has_dept:
+            if dept in teacher_depts.get(tid, ()):
                 continue
             if q and q not in name.lower() and q not in tid.lower():
                 continue
@@ -2530,21 +3150,16 @@ def create_app():
             return jsonify({'ok': False, 'error': 'missing teacherId'}), 400
 
         teachers = load_json(DATA_TEACHERS)
-        t = next((x for x in teachers if str(x.get('id') or '').strip() == teacher_id), None)
+        t = _index_by_id(teachers).get(teacher_id)
         if not t:
             return jsonify({'ok': False, 'error': 'teacher not found'}), 404
 
-        rs = t.get('roles') or []
-        has_dept = any(str(r.get('department') or '').strip() == dept for r in rs)
-        if has_dept:
+        teacher_depts, dept_max = _teacher_dept_stats()
+        if dept in teacher_depts.get(teacher_id, ()):
             return jsonify({'ok': False, 'error': 'teacher already in this department'}), 400
 
         # 该部门的新 order 放到末尾
-        max_order = 0
-        for tt in teachers:
-            for r in (tt.get('roles') or []):
-                if str(r.get('department') or '').strip() == dept:
-                    max_order = max(max_order, _safe_int(r.get('order'), default=0))
+        max_order = dept_max.get(dept, 0)
 
         new_role = {
             'department': dept,
@@ -2571,32 +3186,25 @@ def create_app():
     def teachers_departments_remove_role():
         payload = request.get_json(silent=True) or {}
         role_key = str(payload.get('roleKey') or '').strip()
-        if not role_key or '::' not in role_key:
+        if not role_key:
             return jsonify({'ok': False, 'error': 'missing roleKey'}), 400
 
-        try:
-            teacher_id, dept, pos = role_key.split('::', 2)
-        except Exception:
+        m = _ROLE_KEY_RE.fullmatch(role_key)
+        if not m:
             return jsonify({'ok': False, 'error': 'invalid roleKey'}), 400
+        teacher_id, dept, pos = m.group(1), m.group(2), m.group(3)
 
         teachers = load_json(DATA_TEACHERS)
-        found = False
+        t = _index_by_id(teachers).get(teacher_id)
         removed = 0
-        for t in teachers:
-            if str(t.get('id') or '') != teacher_id:
-                continue
+        if t is not None:
             roles = t.get('roles') or []
-            new_roles = []
-            for r in roles:
-                if str(r.get('department') or '') == dept and str(r.get('position') or '') == pos:
-                    removed += 1
-                    found = True
-                    continue
-                new_roles.append(r)
-            t['roles'] = new_roles
-            break
+            t['roles'] = [r for r in roles
+                          if not (str(r.get('department') or '') == dept
+                                  and str(r.get('position') or '') == pos)]
+            removed = len(roles) - len(t['roles'])
 
-        if not found:
+        if not removed:
             return jsonify({'ok': False, 'error': 'role not found'}), 404
 
         write_json(DATA_TEACHERS, teachers)
@@ -2614,8 +3222,8 @@ def create_app():
     @app.get('/admin/teachers/<tid>')
     @login_required
     def teacher_edit(tid: str):
-        teachers = load_json(DATA_TEACHERS)
-        t = next((x for x in teachers if x.get('id') == tid), None)
+        teachers = load_json_ro(DATA_TEACHERS)
+        t = _index_by_id(teachers).get(tid)
         if not t:
             flash('未找到该教师', 'error')
             return redirect(url_for('teachers_list'))
@@ -2625,7 +3233,7 @@ def create_app():
     @login_required
     def teacher_edit_post(tid: str):
         teachers = load_json(DATA_TEACHERS)
-        t = next((x for x in teachers if x.get('id') == tid), None)
+        t = _index_by_id(teachers).get(tid)
         if not t:
             flash('未找到该教师', 'error')
             return redirect(url_for('teachers_list'))
@@ -2637,13 +3245,12 @@ def create_app():
         t['shortSummary'] = request.form.get('shortSummary') or ''
         t['bio'] = request.form.get('bio') or ''
 
-        tm = _load_teachers_manage_module()
-        apply_rules = (request.form.get('apply_rules') or 'on') in {'1', 'on', 'true', 'True', 'yes', 'YES'}
-        apply_mgmt = (request.form.get('apply_mgmt_order') or 'on') in {'1', 'on', 'true', 'True', 'yes', 'YES'}
+        apply_rules = _is_truthy(request.form.get('apply_rules') or 'on')
+        apply_mgmt = _is_truthy(request.form.get('apply_mgmt_order') or 'on')
 
         if action == 'add_role':
-            dept = getattr(tm, 'clean_dept')(request.form.get('new_department') or '')
-            pos = getattr(tm, 'norm_line')(request.form.get('new_position') or '')
+            dept = _tm_clean_dept(request.form.get('new_department') or '')
+            pos = _tm_norm_line(request.form.get('new_position') or '')
             order = _safe_int(request.form.get('new_order'), default=10**9)
             if not dept or not pos:
                 flash('新增岗位失败：department/position 不能为空', 'error')
@@ -2663,8 +3270,8 @@ def create_app():
             for i in range(min(len(depts), len(poss), len(orders))):
                 if i in delete_idx:
                     continue
-                dept = getattr(tm, 'clean_dept')(depts[i] or '')
-                pos = getattr(tm, 'norm_line')(poss[i] or '')
+                dept = _tm_clean_dept(depts[i] or '')
+                pos = _tm_norm_line(poss[i] or '')
                 order = _safe_int(orders[i], default=10**9)
                 if not dept or not pos:
                     # 跳过空行，避免误写入脏数据
@@ -2674,7 +3281,7 @@ def create_app():
 
         # 应用业务规则
         if apply_rules:
-            getattr(tm, 'normalize_teacher_roles')(t)
+            _tm_normalize_teacher_roles(t)
 
         if apply_mgmt:
             _enforce_mgmt_order([t])
@@ -2686,15 +3293,16 @@ def create_app():
             flash('保存失败：roles 不能为空（至少保留一个岗位）', 'error')
             return redirect(url_for('teacher_edit', tid=tid))
 
-        write_json(DATA_TEACHERS, teachers)
+        _schedule_write(DATA_TEACHERS, teachers)
         flash('已保存（roles 已更新）', 'ok')
         return redirect(url_for('teacher_edit', tid=tid))
 
     @app.get('/admin/students')
     @login_required
     def students_list():
-        students = load_json(DATA_STUDENTS)
-        students = sorted(students, key=lambda x: (-(int(x.get('year') or 0)), str(x.get('name') or '')))
+        # 纯展示路由：sorted 产生新列表，源数据不被改动
+        students = load_json_ro(DATA_STUDENTS)
+        students = sorted(students, key=_student_sort_key)
         return render_template('students_list.html', students=students)
     @app.get('/admin/students-db')
     @login_required
@@ -2957,8 +3565,7 @@ def create_app():
     @app.post('/admin/students/add')
     @login_required
     def students_add():
-        sm = _load_students_manage_module()
-        norm_line = getattr(sm, 'norm_line')
+        norm_line = _sm_norm_line
 
         name = norm_line(request.form.get('name') or '').replace(' ', '')
         school = norm_line(request.form.get('school') or '')
@@ -2979,12 +3586,18 @@ def create_app():
                 return redirect(url_for('students_list'))
 
         students = load_json(DATA_STUDENTS)
-        if any((s.get('name') or '') == name for s in students if isinstance(s, dict)):
+        # 一次遍历同时收集名字集合与 id 集合：重名检查和 id 去重都变成 set 查询
+        names: set = set()
+        existing_ids: set = set()
+        for s in students:
+            if isinstance(s, dict):
+                names.add(s.get('name') or '')
+                existing_ids.add(s.get('id'))
+        if name in names:
             flash('新增失败：已存在同名学生（请先到编辑页修改）', 'error')
             return redirect(url_for('students_list'))
 
-        sid = getattr(sm, 'canonical_id')(name, school, year)
-        existing_ids = {s.get('id') for s in students if isinstance(s, dict)}
+        sid = _sm_canonical_id(name, school, year)
         base = sid
         n = 1
         while sid in existing_ids:
@@ -3013,7 +3626,7 @@ def create_app():
     @app.get('/admin/students/<sid>')
     @login_required
     def student_edit(sid: str):
-        students = load_json(DATA_STUDENTS)
+        students = load_json_ro(DATA_STUDENTS)
         s = next((x for x in students if x.get('id') == sid), None)
         if not s:
             flash('未找到该学生', 'error')
@@ -3023,8 +3636,7 @@ def create_app():
     @app.post('/admin/students/<sid>')
     @login_required
     def student_edit_post(sid: str):
-        sm = _load_students_manage_module()
-        norm_line = getattr(sm, 'norm_line')
+        norm_line = _sm_norm_line
 
         students = load_json(DATA_STUDENTS)
         s = next((x for x in students if x.get('id') == sid), None)
@@ -3056,7 +3668,7 @@ def create_app():
         if action == 'add_admission':
             img = norm_line(request.form.get('new_image') or '')
             note = norm_line(request.form.get('new_note') or '')
-            watermarked = (request.form.get('new_watermarked') or '') in {'1', 'on', 'true', 'True', 'yes', 'YES'}
+            watermarked = _is_truthy(request.form.get('new_watermarked'))
             if not img:
                 flash('新增录取截图失败：image 不能为空', 'error')
                 return redirect(url_for('student_edit', sid=sid))
@@ -3119,7 +3731,7 @@ if __name__ == '__main__':
     app = create_app()
     host = os.environ.get('ADMIN_HOST', '127.0.0.1')
     port = int(os.environ.get('PORT') or os.environ.get('ADMIN_PORT') or '5050')
-    debug = (os.environ.get('ADMIN_DEBUG') or '').strip() in {'1', 'true', 'True', 'yes', 'YES'}
+    debug = _is_truthy(os.environ.get('ADMIN_DEBUG'))
 
     if (os.environ.get('ADMIN_SECRET_KEY') or '').strip() == '':
         print('WARNING: 未设置 ADMIN_SECRET_KEY，session 安全性不足。请设置一个随机长字符串。')
